@@ -4,62 +4,63 @@ import dash
 from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
 import pandas as pd
-import numpy as np
-import plotly.express as px
+import plotly.graph_objects as go
 from dash.dependencies import Input, Output
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from iv_engine import update_atm_vol_history
+from synthetic_data import daily_atm_vol, load_test_universe
+from vol_stats import DEFAULT_STATS_PATH, RollingVolStats, cached_box_plot_stats
 
 # Initialize the Dash app with Bootstrap styling
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 
-# --- Generate Synthetic ATM Volatility Data ---
-np.random.seed(42)  # For reproducibility
-trading_days = 126  # 6 months * 21 trading days/month
-tickers = ['700.HK', '9988.HK', '1211.HK']
-dates = [datetime(2025, 1, 21) + timedelta(days=i) for i in range(trading_days)]
-obs_per_day = 3
-
-# Create synthetic ATM volatility data (3 observations per day)
-data = []
-for ticker in tickers:
-    for date in dates:
-        for obs in range(obs_per_day):
-            # Simulate ATM volatility (20-40% range, with ticker-specific variation)
-            base_vol = 30 if ticker == '700.HK' else 25 if ticker == '9988.HK' else 35  # Tencent, Alibaba, BYD
-            vol = base_vol + np.random.normal(0, 5)  # Add noise
-            vol = max(20, min(40, vol))  # Bound between 20% and 40%
-            data.append({
-                'Ticker': ticker,
-                'Date': date,
-                'ATM_Vol': round(vol, 2)
-            })
-
-vol_df = pd.DataFrame(data)
-
-# Aggregate to daily ATM volatility (mean of 3 observations per day)
-daily_vol_df = vol_df.groupby(['Ticker', 'Date'])['ATM_Vol'].mean().reset_index()
-daily_vol_df['ATM_Vol'] = daily_vol_df['ATM_Vol'].round(2)
+# --- Load ATM Volatility Data ---
+# Real data: SOM chains saved by som_batch.parse_som_reports(..., output_path='som_chains.pkl'),
+# with ATM vol implied from settle prices (mean IV at 95-105% moneyness). Only the display
+# window is considered, and implied vols are solved only for the dates not yet in the
+# persisted ATM-vol table, so a restart does not re-solve the archive
+try:
+    som_chains = pd.read_pickle('som_chains.pkl')
+    chain_dates = pd.to_datetime(som_chains['date'])
+    start = chain_dates.max() - pd.DateOffset(months=6)
+    daily_vol_df = update_atm_vol_history(som_chains[(chain_dates >= start).to_numpy()])
+    del som_chains, chain_dates
+    daily_vol_df = daily_vol_df[daily_vol_df['Date'] >= start]
+    stats_path = DEFAULT_STATS_PATH
+except FileNotFoundError:
+    # --- Generate Synthetic ATM Volatility Data ---
+    # 6 months of calendar days, 3 observations per day averaged to a daily value;
+    # base levels for Tencent, Alibaba and BYD, 20-40% bounds
+    tickers = load_test_universe(['700.HK', '9988.HK', '1211.HK'])
+    dates = pd.date_range(datetime(2025, 1, 21), periods=126)
+    daily_vol_df = daily_atm_vol(tickers, dates, obs_per_day=3, seed=42,
+                                 base_vols={'700.HK': 30, '9988.HK': 25, '1211.HK': 35})
+    stats_path = None  # Nothing to persist for generated data
 
-# Compute summary statistics for the table
-stats_df = daily_vol_df.groupby('Ticker')['ATM_Vol'].agg(
-    Mean='mean',
-    Median='median',
-    Min='min',
-    Max='max',
-    Std='std'
-).reset_index()
+# Summary statistics for the table, from the persisted rolling state (only new dates are appended)
+vol_stats = RollingVolStats.load_or_build(daily_vol_df, path=stats_path)
+stats_df = vol_stats.stats()[['Ticker', 'Mean', 'Median', 'Min', 'Max', 'Std']]
 stats_df = stats_df.round(2)
 
-# Create box plots
-fig = px.box(
-    daily_vol_df,
-    x='Ticker',
-    y='ATM_Vol',
-    title='Daily ATM Volatility (95–105% Moneyness) Over Last 6 Months',
-    labels={'ATM_Vol': 'ATM Volatility (%)', 'Ticker': 'Ticker'},
-    template='plotly_white'
-)
+# Create box plots from quartiles, whiskers and outliers computed on the server, so the
+# figure carries a handful of numbers per ticker instead of every daily observation
+box_df = cached_box_plot_stats(daily_vol_df)
+fig = go.Figure(go.Box(
+    x=box_df['Ticker'],
+    q1=box_df['Q1'],
+    median=box_df['Median'],
+    q3=box_df['Q3'],
+    mean=box_df['Mean'],
+    lowerfence=box_df['LowerFence'],
+    upperfence=box_df['UpperFence'],
+    name='ATM_Vol',
+))
+outliers = box_df[['Ticker', 'Outliers']].explode('Outliers').dropna()
+fig.add_trace(go.Scatter(x=outliers['Ticker'], y=outliers['Outliers'], mode='markers', name='Outliers'))
 fig.update_layout(
+    title='Daily ATM Volatility (95–105% Moneyness) Over Last 6 Months',
+    template='plotly_white',
     xaxis_title='Ticker',
     yaxis_title='ATM Volatility (%)',
     showlegend=False,
@@ -1,20 +1,33 @@
 import os
+import time
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 import plotly.express as px
 import pandas as pd
 
-# Load the DataFrame (assumes it's saved as a pickle file after running process_stock_data)
-# Replace 'processed_data.pkl' with the path to your processed DataFrame
-df = pd.read_pickle('processed_data.pkl')
+from dqe_cache import TickerCache
+from dqe_store import DEFAULT_STORE_PATH, list_tickers, read_version
+
+# Data lives in the date-partitioned store written by update_stock_data (see add dqe).
+# Only the ticker list is loaded here; a ticker's history is read the first time it is shown.
+STORE_PATH = DEFAULT_STORE_PATH
+CACHE_SIZE = 64  # Most recently viewed tickers kept in memory
+VERSION_POLL_MS = 2000  # How often the page checks for data published by dqe_watch.py
 
 # Get list of unique tickers
-tickers = df.columns.get_level_values('ticker').unique()
+tickers = pd.Index(list_tickers(STORE_PATH))
 
 # Select 10 tickers for default display (or fewer if <10 tickers exist)
 default_tickers = tickers[:10]
 
+# Warm the default tickers in the background while the app starts
+cache = TickerCache(STORE_PATH, max_tickers=CACHE_SIZE)
+cache.prefetch(default_tickers)
+
+# Data version the server-side cache was loaded from
+loaded_version = (read_version(STORE_PATH) or {}).get('version')
+
 # Initialize Dash app
 app = dash.Dash(__name__)
 
@@ -47,20 +60,51 @@ app.layout = html.Div([
     dcc.Input(id='ticker-search', type='text', placeholder='Enter ticker (e.g., ABC)', style={'width': '50%'}),
     html.Button('Search', id='search-button', n_clicks=0),
     html.Div(id='search-result'),
-    dcc.Graph(id='search-graph')
+    dcc.Graph(id='search-graph'),
+    
+    # Poll for new data versions so charts refresh without restarting the app
+    dcc.Interval(id='data-version-poll', interval=VERSION_POLL_MS),
+    dcc.Store(id='data-version', data=loaded_version)
 ])
 
+# Callback to hot-swap the data when the ingest service publishes a new version
+@app.callback(
+    Output('data-version', 'data'),
+    [Input('data-version-poll', 'n_intervals')],
+    [State('data-version', 'data')]
+)
+def poll_data_version(n_intervals, client_version):
+    global tickers, loaded_version
+    info = read_version(STORE_PATH)
+    if info is None or info['version'] == client_version:
+        return dash.no_update
+    
+    # Reload once per version on the server, then let every page re-render from the cache
+    if info['version'] != loaded_version:
+        tickers = pd.Index(list_tickers(STORE_PATH))
+        cache.clear()
+        cache.prefetch(default_tickers)
+        loaded_version = info['version']
+        if info.get('landed_at'):
+            print(f"Data version {loaded_version} visible {time.time() - info['landed_at']:.2f}s after the file landed")
+    return info['version']
+
 # Callback to update default ticker graphs
 @app.callback(
     [Output(f'ticker-graph-{ticker}', 'figure') for ticker in default_tickers],
-    [Input('metric-dropdown', 'value')]
+    [Input('metric-dropdown', 'value'), Input('data-version', 'data')]
 )
-def update_default_graphs(selected_metric):
+def update_default_graphs(selected_metric, data_version):
     figures = []
     for ticker in default_tickers:
         # Extract data for the specific ticker and metric
-        data = df[(ticker, selected_metric)].reset_index()
-        data.columns = ['date', selected_metric]
+        try:
+            data = cache.series_frame(ticker, selected_metric)
+        except KeyError:  # Removed from the store since startup
+            fig = px.line()
+            fig.add_annotation(text=f"No data for {ticker}", xref="paper", yref="paper", showarrow=False)
+            figures.append(fig)
+            continue
         
         # Create line plot
         fig = px.line(
@@ -82,9 +126,9 @@ def update_default_graphs(selected_metric):
 @app.callback(
     [Output('search-graph', 'figure'), Output('search-result', 'children')],
     [Input('search-button', 'n_clicks')],
-    [Input('ticker-search', 'value'), Input('metric-dropdown', 'value')]
+    [Input('ticker-search', 'value'), Input('metric-dropdown', 'value'), Input('data-version', 'data')]
 )
-def update_search_graph(n_clicks, search_ticker, selected_metric):
+def update_search_graph(n_clicks, search_ticker, selected_metric, data_version):
     if n_clicks == 0 or not search_ticker:
         return px.line(), "Enter a ticker and click Search."
     
@@ -93,8 +137,10 @@ def update_search_graph(n_clicks, search_ticker, selected_metric):
         return px.line(), f"Ticker {search_ticker} not found."
     
     # Extract data for the searched ticker and metric
-    data = df[(search_ticker, selected_metric)].reset_index()
-    data.columns = ['date', selected_metric]
+    try:
+        data = cache.series_frame(search_ticker, selected_metric)
+    except KeyError:  # Listed, but removed from the store since the list was read
+        return px.line(), f"Ticker {search_ticker} not found."
     
     # Create line plot
     fig = px.line(
@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from dqe_loader import METRIC_COLUMNS
+from dqe_panel import StockPanel
+
+
+class TickerCache:
+    """
+    Lazy, bounded per-ticker access to the DQE store for the dashboards.
+
+    A ticker's full history (all metrics) is read on first access and kept in an LRU of at
+    most max_tickers entries, so resident memory depends on what users look at rather than
+    on the size of the universe. prefetch() loads tickers on a background thread; a
+    callback asking for a ticker that is still being prefetched waits for that read instead
+    of issuing its own.
+    """
+
+    def __init__(self, root, max_tickers=64, metrics=None, dtype=np.float64):
+        self.root = root
+        self.max_tickers = max_tickers
+        self.metrics = list(metrics) if metrics else list(METRIC_COLUMNS)
+        self.dtype = dtype
+        self._panels = OrderedDict()
+        self._pending = {}
+        self._generation = 0  # Bumped by clear() to invalidate reads in flight
+        self._lock = threading.Lock()
+
+    def __contains__(self, ticker):
+        with self._lock:
+            return ticker in self._panels
+
+    def __len__(self):
+        with self._lock:
+            return len(self._panels)
+
+    def _claim(self, tickers):
+        """
+        Mark tickers as loading.
+
+        Returns:
+        tuple: ({ticker: event} this thread has to read, cache generation at the claim)
+        """
+        with self._lock:
+            claimed = {t: threading.Event() for t in dict.fromkeys(tickers)
+                       if t not in self._panels and t not in self._pending}
+            self._pending.update(claimed)
+            return claimed, self._generation
+
+    def _load(self, claimed, generation):
+        """Read the claimed tickers in one store scan and insert them into the LRU."""
+        try:
+            panel = StockPanel.from_store(self.root, tickers=list(claimed), metrics=self.metrics, dtype=self.dtype)
+            with self._lock:
+                if self._generation != generation:
+                    return  # Cleared while reading: the data may predate the new store version
+                for ticker in claimed:
+                    i = panel.ticker_index.get(ticker)
+                    if i is None:
+                        continue  # Not in the store, get() reports it as a KeyError
+                    # Copy so evicting one ticker does not keep the whole batch alive
+                    self._panels[ticker] = StockPanel(
+                        panel.values[i:i + 1].copy(), [ticker], panel.dates, panel.metrics
+                    )
+                    self._panels.move_to_end(ticker)
+                while len(self._panels) > self.max_tickers:
+                    self._panels.popitem(last=False)
+        finally:
+            with self._lock:
+                for ticker, event in claimed.items():
+                    if self._pending.get(ticker) is event:  # Not reclaimed after a clear()
+                        del self._pending[ticker]
+                    event.set()
+
+    def get(self, ticker):
+        """
+        Return the single-ticker StockPanel for a ticker, reading it on first access.
+
+        Raises:
+        KeyError: If the ticker is not in the store
+        """
+        while True:
+            claimed, generation = self._claim([ticker])
+            if claimed:
+                self._load(claimed, generation)
+            else:
+                with self._lock:
+                    event = self._pending.get(ticker)
+                if event is not None:
+                    event.wait()  # Already being read by a prefetch or another callback
+
+            with self._lock:
+                panel = self._panels.get(ticker)
+                if panel is not None:
+                    self._panels.move_to_end(ticker)
+                    return panel
+                if self._generation == generation:
+                    raise KeyError(ticker)
+            # The cache was cleared while the ticker was being read, read it again
+
+    def series_frame(self, ticker, metric):
+        """One ticker's ('date', metric) frame, ready for px.line."""
+        return self.get(ticker).series_frame(ticker, metric)
+
+    def prefetch(self, tickers):
+        """
+        Start reading tickers on a background thread.
+
+        Returns:
+        threading.Thread or None: The loader thread, or None if everything is already cached or loading
+        """
+        claimed, generation = self._claim(tickers)
+        if not claimed:
+            return None
+        thread = threading.Thread(target=self._load, args=(claimed, generation), daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self):
+        """
+        Drop every cached ticker, e.g. after the store has been rewritten.
+
+        Reads still in flight are discarded when they finish rather than inserted, and their
+        tickers no longer count as loading, so a prefetch() right after this reads them again.
+        """
+        with self._lock:
+            self._generation += 1
+            self._panels.clear()
+            self._pending.clear()
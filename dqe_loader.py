@@ -0,0 +1,211 @@
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Regular expression to match DQE_YYMMDD format
+DQE_FILE_PATTERN = re.compile(r'DQE_(\d{6})\.pickle')
+
+# Columns every DQE snapshot must carry
+REQUIRED_COLUMNS = ['ticker', 'volume', 'notional', 'open_interest', 'spot_price']
+METRIC_COLUMNS = ['volume', 'notional', 'open_interest', 'spot_price']
+
+# Largest absolute error accepted when a metric is stored as float32 instead of float64.
+# Counts must survive exactly; prices to 1e-4 and notionals to half a currency unit.
+FLOAT32_TOLERANCES = {'volume': 0.0, 'open_interest': 0.0, 'notional': 0.5, 'spot_price': 1e-4}
+INTEGER_METRICS = ['volume', 'open_interest']
+
+
+def dqe_file_date(filename):
+    """Return the datetime.date encoded in a DQE_YYMMDD.pickle name, or None if it does not match."""
+    match = DQE_FILE_PATTERN.match(filename)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), '%y%m%d').date()
+    except ValueError:
+        return None
+
+
+def hash_file(file_path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def optimize_dqe_dtypes(df, tolerances=None):
+    """
+    Shrink a DQE snapshot in place of its default object/float64 dtypes.
+
+    Tickers become categoricals. Volume and open interest become the narrowest integer
+    type when they are whole numbers with no gaps; any metric whose float32 round trip
+    stays within its tolerance becomes float32; everything else stays float64.
+
+    Parameters:
+    df (pandas.DataFrame): DQE snapshot with the required columns
+    tolerances (dict): metric -> largest absolute float32 error allowed; defaults to FLOAT32_TOLERANCES
+
+    Returns:
+    pandas.DataFrame: The converted frame
+    """
+    tolerances = FLOAT32_TOLERANCES if tolerances is None else tolerances
+    df = df.copy()
+    df['ticker'] = df['ticker'].astype('category')
+    if 'date' in df.columns:
+        df['date'] = df['date'].astype('category')  # One date per file: a single category
+
+    for metric in METRIC_COLUMNS:
+        values = pd.to_numeric(df[metric])
+        as_float = values.to_numpy(dtype=np.float64)
+        finite = np.isfinite(as_float)
+
+        if metric in INTEGER_METRICS and finite.all() and np.array_equal(as_float, np.round(as_float)):
+            df[metric] = pd.to_numeric(values, downcast='integer')
+            continue
+
+        narrow = as_float.astype(np.float32)
+        error = np.abs(narrow[finite].astype(np.float64) - as_float[finite])
+        if metric in tolerances and (error.size == 0 or error.max() <= tolerances[metric]):
+            df[metric] = narrow
+        else:
+            df[metric] = as_float
+    return df
+
+
+def concat_dqe_frames(frames):
+    """
+    Concatenate DQE snapshots, keeping 'ticker' and 'date' categorical when every frame has them.
+
+    Each file has its own category set and pandas falls back to object values when they
+    differ, so the categories are unified before concatenating.
+    """
+    for column in ('ticker', 'date'):
+        if all(column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype) for df in frames):
+            categories = sorted(set().union(*(df[column].cat.categories for df in frames)))
+            frames = [df.assign(**{column: df[column].cat.set_categories(categories)}) for df in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _load_dqe_file(directory_path, filename, optimize_dtypes=False):
+    """
+    Worker: read one DQE file, check its columns and stamp it with its date.
+
+    Messages are returned rather than printed so the caller can report them in date
+    order when this runs inside a process pool.
+
+    Returns:
+    tuple: (pandas.DataFrame or None, message or None, (bytes before, bytes after) or None)
+    """
+    try:
+        # Convert YYMMDD to datetime
+        date = datetime.strptime(DQE_FILE_PATTERN.match(filename).group(1), '%y%m%d').date()
+
+        # Read pickle file
+        file_path = os.path.join(directory_path, filename)
+        df = pd.read_pickle(file_path)
+
+        # Ensure required columns exist
+        if not all(col in df.columns for col in REQUIRED_COLUMNS):
+            return None, f"Warning: File {filename} missing some required columns", None
+
+        # Keep only what the pivot needs, this is also what crosses the process boundary
+        df = df[REQUIRED_COLUMNS].copy()
+
+        # Add date column
+        df['date'] = date
+
+        memory = None
+        if optimize_dtypes:
+            before = df.memory_usage(deep=True).sum()
+            df = optimize_dqe_dtypes(df)
+            memory = (int(before), int(df.memory_usage(deep=True).sum()))
+        return df, None, memory
+
+    except Exception as e:
+        return None, f"Error processing file {filename}: {str(e)}", None
+
+
+def load_dqe_files(directory_path, filenames=None, max_workers=None, optimize_dtypes=False, memory_report=None):
+    """
+    Read DQE files across a process pool and return them in date order.
+
+    Parameters:
+    directory_path (str): Path to the directory containing pickle files
+    filenames (list): DQE file names to read; defaults to every DQE file in the directory
+    max_workers (int): Number of worker processes; 1 reads serially in this process,
+                       None uses one process per CPU
+    optimize_dtypes (bool): Convert each file with optimize_dqe_dtypes as it is read
+    memory_report (dict): If given, filled with 'rows', 'bytes_before' and 'bytes_after'
+                          totals for the optimized files
+
+    Returns:
+    list: pandas.DataFrame per valid file, sorted by date
+    """
+    if filenames is None:
+        filenames = os.listdir(directory_path)
+
+    # Names that look like DQE files but carry an impossible date are reported, not read
+    for name in sorted(filenames):
+        if DQE_FILE_PATTERN.match(name) and dqe_file_date(name) is None:
+            print(f"Error processing file {name}: invalid date in file name")
+
+    # Sort by the date in the name so results and warnings come back in date order
+    dated = sorted((date, name) for name in filenames if (date := dqe_file_date(name)) is not None)
+    filenames = [name for _, name in dated]
+    if not filenames:
+        return []
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(filenames))
+
+    if max_workers <= 1:
+        results = [_load_dqe_file(directory_path, name, optimize_dtypes) for name in filenames]
+    else:
+        # A few chunks per worker keeps the pool busy without paying per-file IPC overhead
+        chunksize = max(1, len(filenames) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(
+                _load_dqe_file, [directory_path] * len(filenames), filenames,
+                [optimize_dtypes] * len(filenames), chunksize=chunksize
+            ))
+
+    all_data = []
+    for df, message, memory in results:
+        if message:
+            print(message)
+        if df is not None:
+            all_data.append(df)
+            if memory is not None and memory_report is not None:
+                memory_report['rows'] = memory_report.get('rows', 0) + len(df)
+                memory_report['bytes_before'] = memory_report.get('bytes_before', 0) + memory[0]
+                memory_report['bytes_after'] = memory_report.get('bytes_after', 0) + memory[1]
+    return all_data
+
+
+def measure_combined_memory(memory_report, combined_df):
+    """
+    Replace 'bytes_after' with the size of the concatenated frame. Each file holds every
+    ticker once, so per-file categoricals look like savings that only the combined frame,
+    with its shared categories, actually delivers.
+    """
+    if 'bytes_before' in memory_report:
+        memory_report['bytes_after'] = int(combined_df.memory_usage(deep=True).sum())
+    return memory_report
+
+
+def format_memory_report(memory_report):
+    """One-line summary of a memory_report filled by load_dqe_files."""
+    before = memory_report.get('bytes_before', 0)
+    after = memory_report.get('bytes_after', 0)
+    saved = before - after
+    pct = 100 * saved / before if before else 0.0
+    return (f"DQE memory: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB for "
+            f"{memory_report.get('rows', 0)} rows (saved {saved / 1e6:.1f} MB, {pct:.0f}%)")
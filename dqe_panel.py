@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+from dqe_loader import METRIC_COLUMNS
+
+
+class StockPanel:
+    """
+    Dense ticker x date x metric panel backed by one contiguous NumPy cube.
+
+    values[i, j, k] is metric k of ticker i on date j; missing observations are NaN.
+    Ticker, date and metric labels map to integer positions through plain dicts, so
+    every lookup is O(1) and every slice below is a view into the cube, not a copy.
+    """
+
+    def __init__(self, values, tickers, dates, metrics):
+        values = np.ascontiguousarray(values)
+        if values.shape != (len(tickers), len(dates), len(metrics)):
+            raise ValueError(
+                f"values shape {values.shape} does not match "
+                f"{len(tickers)} tickers x {len(dates)} dates x {len(metrics)} metrics"
+            )
+        self.values = values
+        self.tickers = list(tickers)
+        self.dates = list(dates)
+        self.metrics = list(metrics)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.date_index = {day: j for j, day in enumerate(self.dates)}
+        self.metric_index = {metric: k for k, metric in enumerate(self.metrics)}
+
+    def __repr__(self):
+        return (f"StockPanel({len(self.tickers)} tickers x {len(self.dates)} dates x "
+                f"{len(self.metrics)} metrics, dtype={self.values.dtype})")
+
+    # ------------------------
+    # Construction
+    # ------------------------
+
+    @classmethod
+    def from_frame(cls, df, dtype=np.float64):
+        """
+        Build a panel from the processed_data.pkl layout.
+
+        Parameters:
+        df (pandas.DataFrame): Date index and MultiIndex (ticker, metric) columns
+        dtype: np.float32 halves the memory, np.float64 keeps full precision
+
+        Returns:
+        StockPanel
+        """
+        tickers = list(df.columns.get_level_values('ticker').unique())
+        metrics = [m for m in METRIC_COLUMNS if m in set(df.columns.get_level_values('metric'))]
+        full_columns = pd.MultiIndex.from_product([tickers, metrics], names=['ticker', 'metric'])
+
+        # (date, ticker * metric) -> (date, ticker, metric) -> (ticker, date, metric)
+        flat = df.sort_index().reindex(columns=full_columns).to_numpy(dtype=dtype)
+        values = flat.reshape(len(df.index), len(tickers), len(metrics)).transpose(1, 0, 2)
+        return cls(values, tickers, df.sort_index().index, metrics)
+
+    @classmethod
+    def from_long(cls, long_df, metrics=None, dtype=np.float64):
+        """
+        Build a panel straight from long DQE rows ('date', 'ticker' and metric columns),
+        scattering them into the cube without going through a pivot.
+        """
+        metrics = list(metrics) if metrics else [m for m in METRIC_COLUMNS if m in long_df.columns]
+        ticker_codes, tickers = pd.factorize(long_df['ticker'], sort=True)
+        date_codes, dates = pd.factorize(long_df['date'], sort=True)
+
+        values = np.full((len(tickers), len(dates), len(metrics)), np.nan, dtype=dtype)
+        values[ticker_codes, date_codes, :] = long_df[metrics].to_numpy(dtype=dtype)
+        return cls(values, tickers, dates, metrics)
+
+    @classmethod
+    def from_store(cls, root, tickers=None, metrics=None, start=None, end=None, dtype=np.float64):
+        """Read a panel from the date-partitioned store (see dqe_store.py)."""
+        from dqe_store import read_long
+
+        long_df = read_long(root, tickers, metrics, start, end)
+        return cls.from_long(long_df, metrics, dtype)
+
+    # ------------------------
+    # Zero-copy slicing
+    # ------------------------
+
+    def ticker(self, ticker):
+        """(dates, metrics) view for one ticker."""
+        return self.values[self.ticker_index[ticker]]
+
+    def metric(self, metric):
+        """(tickers, dates) view for one metric."""
+        return self.values[:, :, self.metric_index[metric]]
+
+    def cross_section(self, day):
+        """(tickers, metrics) view for one date."""
+        return self.values[:, self.date_index[day], :]
+
+    def series(self, ticker, metric):
+        """1-D view of one ticker's time series for one metric."""
+        return self.values[self.ticker_index[ticker], :, self.metric_index[metric]]
+
+    def series_frame(self, ticker, metric):
+        """
+        One ticker's time series as a two-column ('date', metric) DataFrame, the shape
+        the dashboards hand to px.line.
+        """
+        return pd.DataFrame({'date': self.dates, metric: self.series(ticker, metric)})
+
+    # ------------------------
+    # Vectorized cross-sectional operations (across tickers, per date)
+    # ------------------------
+
+    def cross_sectional_mean(self, metric):
+        """Mean across tickers for every date, ignoring NaN."""
+        return np.nanmean(self.metric(metric), axis=0)
+
+    def cross_sectional_zscore(self, metric):
+        """(tickers, dates) z-scores of a metric against the same-day cross-section."""
+        data = self.metric(metric)
+        mean = np.nanmean(data, axis=0)
+        std = np.nanstd(data, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (data - mean) / std
+
+    def cross_sectional_rank(self, metric):
+        """(tickers, dates) percentile ranks in (0, 1] within each date; ties keep ticker order, NaN stays NaN."""
+        data = self.metric(metric)
+        missing = np.isnan(data)
+        # Push NaN to the end of every column so the ranks of real values start at 1
+        order = np.argsort(np.where(missing, np.inf, data), axis=0, kind='stable')
+        ranks = np.empty(data.shape, dtype=self.values.dtype)
+        np.put_along_axis(ranks, order, np.arange(1, data.shape[0] + 1, dtype=ranks.dtype)[:, None], axis=0)
+        counts = (~missing).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ranks = ranks / counts
+        ranks[missing] = np.nan
+        return ranks
+
+    # ------------------------
+    # Conversion
+    # ------------------------
+
+    def to_frame(self):
+        """
+        Convert back to the processed_data.pkl layout (date index, (ticker, metric) columns)
+        for callers that still need a DataFrame.
+        """
+        flat = self.values.transpose(1, 0, 2).reshape(len(self.dates), -1)
+        columns = pd.MultiIndex.from_product([self.tickers, self.metrics], names=['ticker', 'metric'])
+        return pd.DataFrame(flat, index=pd.Index(self.dates, name='date'), columns=columns)
@@ -0,0 +1,256 @@
+import json
+import os
+import shutil
+import time
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from dqe_loader import METRIC_COLUMNS
+
+# Date-partitioned columnar store for DQE data, replacing processed_data.pkl
+#
+# Layout (hive partitioning, one partition per DQE day):
+#   <root>/date=2025-07-30/part-0.parquet   rows sorted by ticker
+#   <root>/_tickers.json                      ticker universe, so listing it reads no data
+#   <root>/_version.json                      data version published after each ingest
+#
+# Rows are kept long (ticker, volume, notional, ...) so a ticker filter is pushed down to
+# the row-group statistics and a metric selection is a plain column projection.
+
+DEFAULT_STORE_PATH = 'dqe_store'
+ROW_GROUP_SIZE = 1024
+TICKERS_FILE = '_tickers.json'
+VERSION_FILE = '_version.json'
+
+STORE_SCHEMA = pa.schema([('ticker', pa.string())] + [(metric, pa.float64()) for metric in METRIC_COLUMNS])
+
+_PARTITIONING = ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive')
+
+
+def _as_date(value):
+    """Accept datetime.date, datetime, pandas.Timestamp or ISO string."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def _partition_dir(root, day):
+    return os.path.join(root, f"date={_as_date(day).isoformat()}")
+
+
+def _write_tickers(root, tickers):
+    path = os.path.join(root, TICKERS_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(sorted(tickers), f)
+    os.replace(tmp_path, path)
+
+
+def _update_tickers(root, tickers):
+    known = set(list_tickers(root))
+    if not known.issuperset(tickers):
+        _write_tickers(root, known.union(tickers))
+
+
+def rebuild_tickers(root):
+    """Rewrite the ticker universe from the partitions in the store, reading only the ticker column."""
+    tickers = set()
+    if list_dates(root):
+        table = pq.read_table(root, columns=['ticker'], partitioning=_PARTITIONING, memory_map=True)
+        tickers = set(table.column('ticker').unique().to_pylist())
+    _write_tickers(root, tickers)
+    return sorted(tickers)
+
+
+def write_partitions(root, frames):
+    """
+    Write (or overwrite) one partition per date found in the given DQE frames.
+
+    Parameters:
+    root (str): Store directory
+    frames (list or pandas.DataFrame): Long DQE data with 'date', 'ticker' and metric columns
+
+    Returns:
+    list: Dates (datetime.date) that were written
+    """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    if not frames:
+        return []
+    long_df = pd.concat(frames, ignore_index=True)
+    os.makedirs(root, exist_ok=True)
+
+    written = []
+    for day, day_df in long_df.groupby('date', sort=True, observed=True):
+        day_df = (
+            day_df[['ticker'] + METRIC_COLUMNS]
+            .drop_duplicates('ticker', keep='first')  # Same as the pivot's aggfunc='first'
+            .sort_values('ticker')
+        )
+        # Fixed schema across partitions, whatever dtypes the ingest used in memory
+        table = pa.Table.from_pandas(day_df, schema=STORE_SCHEMA, preserve_index=False)
+
+        # Write next to the partition and swap it in so readers never see a half-written file
+        part_dir = _partition_dir(root, day)
+        os.makedirs(part_dir, exist_ok=True)
+        tmp_path = os.path.join(part_dir, '.part-0.parquet.tmp')
+        pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, os.path.join(part_dir, 'part-0.parquet'))
+        written.append(_as_date(day))
+
+    _update_tickers(root, long_df['ticker'].astype(str).unique())
+    return written
+
+
+def delete_partitions(root, dates):
+    """
+    Remove the partitions of the given dates, if present, and drop tickers that only
+    appeared on them from the ticker universe.
+    """
+    removed = False
+    for day in dates:
+        part_dir = _partition_dir(root, day)
+        if os.path.isdir(part_dir):
+            shutil.rmtree(part_dir)
+            removed = True
+    if removed:
+        rebuild_tickers(root)
+
+
+def list_dates(root):
+    """Return the sorted partition dates in the store, from directory names only."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        _as_date(name.split('=', 1)[1]) for name in os.listdir(root) if name.startswith('date=')
+    )
+
+
+def list_tickers(root):
+    """Return the sorted ticker universe of the store without reading any partition."""
+    path = os.path.join(root, TICKERS_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def read_long(root, tickers=None, metrics=None, start=None, end=None):
+    """
+    Read DQE rows from the store with column projection and predicate pushdown.
+
+    Parameters:
+    root (str): Store directory
+    tickers (list): Tickers to read; None reads all
+    metrics (list): Metric columns to read; None reads all four
+    start, end: Inclusive date bounds; partitions outside them are never opened
+
+    Returns:
+    pandas.DataFrame: Long frame with 'date', 'ticker' and the requested metric columns
+    """
+    metrics = list(metrics) if metrics else list(METRIC_COLUMNS)
+    filters = []
+    if tickers is not None:
+        filters.append(('ticker', 'in', [str(t) for t in tickers]))
+    if start is not None:
+        filters.append(('date', '>=', _as_date(start)))
+    if end is not None:
+        filters.append(('date', '<=', _as_date(end)))
+
+    if not list_dates(root):
+        return pd.DataFrame(columns=['date', 'ticker'] + metrics)
+
+    table = pq.read_table(
+        root,
+        columns=['date', 'ticker'] + metrics,
+        filters=filters or None,
+        partitioning=_PARTITIONING,
+        memory_map=True,
+    )
+    return table.to_pandas()
+
+
+def read_panel(root, tickers=None, metrics=None, start=None, end=None):
+    """
+    Read the store into the processed_data.pkl shape: date index, (ticker, metric) columns.
+
+    Parameters:
+    root (str): Store directory
+    tickers (list): Tickers to read; None reads all
+    metrics (list): Metric columns to read; None reads all four
+    start, end: Inclusive date bounds
+
+    Returns:
+    pandas.DataFrame: Multi-indexed DataFrame with date index and (ticker, metric) columns
+    """
+    metrics = list(metrics) if metrics else list(METRIC_COLUMNS)
+    long_df = read_long(root, tickers, metrics, start, end)
+
+    result_df = long_df.pivot(index='date', columns='ticker', values=metrics).sort_index()
+    result_df.columns = pd.MultiIndex.from_tuples(
+        [(ticker, metric) for metric, ticker in result_df.columns],
+        names=['ticker', 'metric']
+    )
+    return result_df
+
+
+def read_series(root, ticker, metric, start=None, end=None):
+    """
+    Read one ticker's time series for one metric.
+
+    Returns:
+    pandas.Series: Values indexed by date, named after the metric
+    """
+    long_df = read_long(root, [ticker], [metric], start, end)
+    return long_df.set_index('date')[metric].sort_index()
+
+
+def read_version(root):
+    """
+    Return the data version last published for the store, or None if nothing was published.
+
+    Returns:
+    dict: {'version', 'published_at', 'landed_at', 'latency_seconds', 'dates'}
+    """
+    path = os.path.join(root, VERSION_FILE)
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def publish_version(root, dates, landed_at=None):
+    """
+    Bump the store's data version so running dashboards pick up the new data.
+
+    Parameters:
+    root (str): Store directory
+    dates (list): Dates that changed in this ingest
+    landed_at (float): Epoch time the newest source file finished landing, used to report latency
+
+    Returns:
+    dict: The published version record
+    """
+    previous = read_version(root) or {'version': 0}
+    published_at = time.time()
+    record = {
+        'version': previous['version'] + 1,
+        'published_at': published_at,
+        'landed_at': landed_at,
+        'latency_seconds': None if landed_at is None else published_at - landed_at,
+        'dates': [_as_date(day).isoformat() for day in dates],
+    }
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, VERSION_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(record, f)
+    os.replace(tmp_path, path)
+    return record
@@ -0,0 +1,172 @@
+import argparse
+import os
+import runpy
+import threading
+import time
+
+from dqe_loader import dqe_file_date
+from dqe_store import DEFAULT_STORE_PATH, publish_version
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Fall back to polling only
+    FileSystemEventHandler = object
+    Observer = None
+
+# "add dqe" has no .py extension, so load its functions by path
+_DQE = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'add dqe'))
+update_stock_data = _DQE['update_stock_data']
+
+
+class _WakeHandler(FileSystemEventHandler):
+    """Wake the watcher loop on any filesystem event in the DQE directory."""
+
+    def __init__(self, wake):
+        self.wake = wake
+
+    def on_any_event(self, event):
+        self.wake.set()
+
+
+class DQEWatcher:
+    """
+    Long-running ingest service for a directory of DQE_YYMMDD.pickle files.
+
+    The directory is watched with inotify (via watchdog, if installed) or polled. A change is
+    only ingested once every DQE file has kept the same size and mtime for settle_seconds,
+    so files that are still being copied are not read half-written. Each ingest goes
+    through update_stock_data (only new or changed days are read) and then bumps the store's
+    data version, which the dashboards poll to hot-swap their data.
+
+    Writers that can should still write to a temporary name and rename into place.
+    """
+
+    def __init__(self, directory_path, store_path=DEFAULT_STORE_PATH, output_path=None,
+                 poll_interval=1.0, settle_seconds=1.0, max_workers=1, use_inotify=True):
+        self.directory_path = directory_path
+        self.store_path = store_path
+        self.output_path = output_path
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.max_workers = max_workers
+        self.use_inotify = use_inotify and Observer is not None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._ingested = {}
+        self._caught_up = False
+
+    def snapshot(self):
+        """Return {filename: (size, mtime)} for the DQE files currently in the directory."""
+        files = {}
+        for entry in os.scandir(self.directory_path):
+            if dqe_file_date(entry.name) is None:
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # Removed between listing and stat
+            files[entry.name] = (stat.st_size, stat.st_mtime)
+        return files
+
+    def ingest(self, snapshot=None):
+        """
+        Ingest new or changed days and publish a new data version if anything changed.
+
+        Returns:
+        dict or None: The published version record, or None if the data was already up to date
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        landed = [mtime for name, (size, mtime) in snapshot.items() if self._ingested.get(name) != (size, mtime)]
+
+        dates = update_stock_data(
+            self.directory_path,
+            output_path=self.output_path,
+            max_workers=self.max_workers,
+            store_path=self.store_path,
+        )
+        # The first ingest catches up on every file, so there is no landing time to measure from
+        catching_up = not self._caught_up
+        self._ingested = snapshot
+        self._caught_up = True
+        if not dates:
+            return None
+
+        landed_at = max(landed) if landed and not catching_up else None
+        record = publish_version(self.store_path, dates, landed_at=landed_at)
+        latency = record['latency_seconds']
+        print(f"Published data version {record['version']} for {len(dates)} day(s)"
+              + (f", {latency:.2f}s after the file landed" if latency is not None else ""))
+        return record
+
+    def _try_ingest(self, snapshot):
+        """Ingest, reporting a failure instead of raising; the batch stays pending for a retry."""
+        try:
+            self.ingest(snapshot)
+            return True
+        except Exception as e:
+            print(f"Ingest failed, will retry on the next poll: {str(e)}")
+            return False
+
+    def run_forever(self):
+        """Catch up on anything missed while stopped, then watch until stop() is called."""
+        observer = None
+        if self.use_inotify:
+            observer = Observer()
+            observer.schedule(_WakeHandler(self._wake), self.directory_path, recursive=False)
+            observer.start()
+
+        try:
+            last = self.snapshot()
+            retry = not self._try_ingest(last)
+            last_change = None
+            while not self._stop.is_set():
+                # While a change is settling, re-check often enough to ingest right after it settles
+                timeout = self.poll_interval if last_change is None else min(self.poll_interval, self.settle_seconds / 2)
+                self._wake.wait(timeout)
+                self._wake.clear()
+
+                current = self.snapshot()
+                now = time.time()
+                if current != last:
+                    last = current
+                    last_change = now
+                    continue
+                if retry or (last_change is not None and now - last_change >= self.settle_seconds):
+                    last_change = None
+                    retry = not self._try_ingest(current)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Watch a DQE directory and ingest new files into the store.")
+    parser.add_argument('directory', help="Directory that receives DQE_YYMMDD.pickle files")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help="Partitioned store read by the dashboards")
+    parser.add_argument('--pickle', default=None, help="Also keep this processed_data.pkl up to date")
+    parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between directory scans")
+    parser.add_argument('--settle', type=float, default=1.0, help="Seconds a file must stay unchanged before ingest")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for reading files")
+    parser.add_argument('--no-inotify', action='store_true', help="Poll even if watchdog is installed")
+    args = parser.parse_args()
+
+    watcher = DQEWatcher(
+        args.directory,
+        store_path=args.store,
+        output_path=args.pickle,
+        poll_interval=args.poll_interval,
+        settle_seconds=args.settle,
+        max_workers=args.workers,
+        use_inotify=not args.no_inotify,
+    )
+    try:
+        watcher.run_forever()
+    except KeyboardInterrupt:
+        watcher.stop()
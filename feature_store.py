@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from ridge_batch import FEATURES, TARGET
+
+# Materialized lag/lead/rolling features for the ATM vol regressions.
+#
+# The features are computed in one pass over the frame sorted by (code, date): a shift by
+# k rows is valid where the row k places earlier belongs to the same code, and rolling
+# means and standard deviations come from cumulative sums over the sorted rows. The result
+# is stored under a hash of the feature spec together with the data version it was built
+# from. When new days arrive only those rows, plus the rows whose leads they complete, are
+# recomputed from a short tail of each code's history.
+
+DEFAULT_FEATURE_DIR = 'feature_store'
+
+DEFAULT_SPEC = {
+    'columns': ['ATM_vol'] + FEATURES,
+    'lags': {'ATM_vol': [1, 2, 5]},
+    'leads': {'ATM_vol': [1]},
+    'rolling': {'ATM_vol': [5, 21], 'Volume': [5]},
+    'target': ['ATM_vol', 1],  # Stored as TARGET: ATM_vol one row ahead, as in the ridge scripts
+}
+
+
+def spec_key(spec):
+    """Short stable hash of a feature spec."""
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _spec_extent(spec):
+    """(rows of history the features look back, rows they look ahead)."""
+    back = [k for ks in spec.get('lags', {}).values() for k in ks]
+    back += [w - 1 for ws in spec.get('rolling', {}).values() for w in ws]
+    ahead = [k for ks in spec.get('leads', {}).values() for k in ks] + [spec['target'][1]]
+    return max(back, default=0), max(ahead, default=0)
+
+
+def _shift(values, group, k):
+    """values shifted k rows within each group (k > 0 looks back, k < 0 ahead); NaN across groups."""
+    n = len(values)
+    out = np.full(n, np.nan)
+    if k > 0 and k < n:
+        same = group[k:] == group[:-k]
+        out[k:] = np.where(same, values[:-k], np.nan)
+    elif k < 0 and -k < n:
+        same = group[:k] == group[-k:]
+        out[:k] = np.where(same, values[-k:], np.nan)
+    return out
+
+
+def _rolling(values, group, window):
+    """Rolling mean and sample std over `window` rows within each group (full windows only)."""
+    n = len(values)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if window > n:
+        return mean, std
+    filled = np.nan_to_num(values)
+    cs = np.concatenate([[0.0], np.cumsum(filled)])
+    cs2 = np.concatenate([[0.0], np.cumsum(filled * filled)])
+    nans = np.concatenate([[0], np.cumsum(np.isnan(values))])
+
+    end = np.arange(window, n + 1)        # Window covers rows [end - window, end)
+    total = cs[end] - cs[end - window]
+    total_sq = cs2[end] - cs2[end - window]
+    valid = (group[end - window] == group[end - 1]) & (nans[end] - nans[end - window] == 0)
+    m = total / window
+    var = np.maximum(total_sq - window * m * m, 0.0) / (window - 1) if window > 1 else np.zeros_like(m)
+    mean[window - 1:] = np.where(valid, m, np.nan)
+    std[window - 1:] = np.where(valid, np.sqrt(var), np.nan)
+    return mean, std
+
+
+def compute_features(df, spec=DEFAULT_SPEC, code_col='SEHK_Code', date_col='date'):
+    """
+    Compute every feature of the spec in one grouped pass.
+
+    Returns:
+    pandas.DataFrame: Rows sorted by (code, date) with the spec's columns, '<col>_lag<k>',
+                      '<col>_lead<k>', '<col>_mean<w>', '<col>_std<w>' and TARGET
+    """
+    data = df[[code_col, date_col] + list(spec['columns'])].sort_values([code_col, date_col], kind='mergesort')
+    data = data.reset_index(drop=True)
+    group, _ = pd.factorize(data[code_col])
+    columns = {}
+    for col, ks in spec.get('lags', {}).items():
+        values = data[col].to_numpy(dtype=np.float64)
+        for k in ks:
+            columns[f'{col}_lag{k}'] = _shift(values, group, k)
+    for col, ks in spec.get('leads', {}).items():
+        values = data[col].to_numpy(dtype=np.float64)
+        for k in ks:
+            columns[f'{col}_lead{k}'] = _shift(values, group, -k)
+    for col, windows in spec.get('rolling', {}).items():
+        values = data[col].to_numpy(dtype=np.float64)
+        for w in windows:
+            columns[f'{col}_mean{w}'], columns[f'{col}_std{w}'] = _rolling(values, group, w)
+    target_col, horizon = spec['target']
+    columns[TARGET] = _shift(data[target_col].to_numpy(dtype=np.float64), group, -horizon)
+    return pd.concat([data, pd.DataFrame(columns)], axis=1)
+
+
+def _frame_version(df, previous=None):
+    """
+    Content hash used as the data version when none is given. Appended rows are hashed
+    onto the previous version, so an update never rehashes the stored history.
+    """
+    digest = hashlib.sha256((previous or '').encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+class FeatureStore:
+    """
+    Materialized features for one spec, persisted under <root>/<spec_key>.pkl.
+
+    Parameters:
+    root (str): Store directory
+    spec (dict): Feature spec; DEFAULT_SPEC if omitted
+    """
+
+    def __init__(self, root=DEFAULT_FEATURE_DIR, spec=None, code_col='SEHK_Code', date_col='date'):
+        self.root = root
+        self.spec = DEFAULT_SPEC if spec is None else spec
+        self.key = spec_key(self.spec)
+        self.code_col = code_col
+        self.date_col = date_col
+        self.path = os.path.join(root, f'{self.key}.pkl')
+        self._state = None
+
+    def _load(self):
+        if self._state is None and os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                self._state = pickle.load(f)
+        return self._state
+
+    def _save(self, frame, data_version):
+        os.makedirs(self.root, exist_ok=True)
+        self._state = {
+            'spec': self.spec,
+            'data_version': data_version,
+            'last_date': frame[self.date_col].max() if len(frame) else None,
+            'frame': frame,
+        }
+        with open(self.path + '.tmp', 'wb') as f:
+            pickle.dump(self._state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(self.path + '.tmp', self.path)
+
+    @property
+    def data_version(self):
+        state = self._load()
+        return None if state is None else state['data_version']
+
+    def build(self, df, data_version=None):
+        """Compute all features from scratch and persist them."""
+        data_version = _frame_version(df) if data_version is None else data_version
+        frame = compute_features(df, self.spec, self.code_col, self.date_col)
+        self._save(frame, data_version)
+        return frame
+
+    def update(self, df, data_version=None):
+        """
+        Bring the store up to date with df.
+
+        Nothing is computed when the given data version matches the stored one. Otherwise
+        only rows dated after the stored last date are new: they are computed together with a
+        tail of each code's stored rows long enough for their lags and rolling windows, and
+        the stored rows whose leads they complete are replaced too. History up to the stored
+        last date is assumed unchanged; call build() after back-fills or corrections. Without
+        a data_version, the new version is the stored one with the new rows hashed on.
+
+        Returns:
+        pandas.DataFrame: The full materialized frame
+        """
+        state = self._load()
+        if state is None or state['spec'] != self.spec or state['last_date'] is None:
+            return self.build(df, data_version)
+        if data_version is not None and state['data_version'] == data_version:
+            return state['frame']
+
+        stored = state['frame']
+        new_rows = df[pd.to_datetime(df[self.date_col]) > pd.Timestamp(state['last_date'])]
+        if new_rows.empty:
+            if data_version is not None:
+                self._save(stored, data_version)
+            return stored
+        if data_version is None:
+            data_version = _frame_version(new_rows, state['data_version'])
+
+        back, ahead = _spec_extent(self.spec)
+        by_code = stored.groupby(self.code_col, sort=False, observed=True)
+        # The replaced rows need `back` rows of history of their own
+        tail = stored[by_code.cumcount(ascending=False) < back + ahead]
+        base = list(self.spec['columns'])
+        chunk = compute_features(
+            pd.concat([tail[[self.code_col, self.date_col] + base], new_rows], ignore_index=True),
+            self.spec, self.code_col, self.date_col)
+
+        # Keep from the chunk: the new rows and the last `ahead` stored rows of each code
+        replaced = stored.index[by_code.cumcount(ascending=False) < ahead]
+        refreshed_keys = pd.MultiIndex.from_frame(stored.loc[replaced, [self.code_col, self.date_col]])
+        chunk_keys = pd.MultiIndex.from_frame(chunk[[self.code_col, self.date_col]])
+        is_new = (pd.to_datetime(chunk[self.date_col]) > pd.Timestamp(state['last_date'])).to_numpy()
+        keep = is_new | chunk_keys.isin(refreshed_keys)
+
+        frame = pd.concat([stored.drop(index=replaced), chunk[keep]], ignore_index=True)
+        frame = frame.sort_values([self.code_col, self.date_col], kind='mergesort').reset_index(drop=True)
+        self._save(frame, data_version)
+        return frame
+
+    def frame(self):
+        """The materialized frame, or None if nothing has been built."""
+        state = self._load()
+        return None if state is None else state['frame']
+
+    def training_frame(self, features=FEATURES):
+        """Rows with all given features and TARGET present, as prepare_ridge_data returns them."""
+        frame = self.frame()
+        if frame is None:
+            raise ValueError("feature store is empty; call update() first")
+        required = [self.spec['target'][0]] + list(features) + [TARGET]
+        return frame.dropna(subset=required).reset_index(drop=True)
+
+    def matrices(self, features=FEATURES):
+        """
+        Training matrices read straight from the store.
+
+        Returns:
+        tuple: (X (rows, features) float64, y (rows,), codes (rows,), dates (rows,))
+        """
+        data = self.training_frame(features)
+        return (data[list(features)].to_numpy(dtype=np.float64), data[TARGET].to_numpy(dtype=np.float64),
+                data[self.code_col].to_numpy(), data[self.date_col].to_numpy())
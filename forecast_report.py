@@ -0,0 +1,156 @@
+import hashlib
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # Headless: render to files, never open a window
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from ridge_batch import TARGET, prepare_ridge_data
+
+# Static report of out-of-sample forecast plots.
+#
+# Each plot is rendered to a PNG by a worker process with the Agg backend, and an
+# index.html links them all with their metrics. A manifest keeps the hash of the data
+# behind every PNG, so a re-render only redraws plots whose data changed.
+
+DEFAULT_REPORT_DIR = 'forecast_report'
+MANIFEST_FILE = '_manifest.json'
+
+
+def _plot_hash(plot):
+    digest = hashlib.sha256()
+    digest.update(repr((plot['title'], plot.get('figsize'))).encode())
+    digest.update(np.asarray(plot['dates'], dtype='datetime64[ns]').tobytes())
+    for key in ('y_true', 'y_pred'):
+        digest.update(np.ascontiguousarray(plot[key], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def _render_plot(path, dates, y_true, y_pred, title, figsize=(7, 4)):
+    """Worker: draw one true-vs-predicted plot to a PNG, as ridge_regr2.py draws it on screen."""
+    fig = plt.figure(figsize=figsize)
+    plt.plot(dates, y_true, label='True')
+    plt.plot(dates, y_pred, label='Predicted', linestyle='--')
+    plt.title(title)
+    plt.xlabel('Date')
+    plt.ylabel('ATM Volatility (1-day ahead)')
+    plt.legend()
+    plt.tight_layout()
+    fig.savefig(path + '.tmp.png', dpi=100)
+    plt.close(fig)
+    os.replace(path + '.tmp.png', path)
+    return path
+
+
+def _file_name(name):
+    safe = ''.join(ch if ch.isalnum() or ch in '-_' else '_' for ch in str(name))
+    return f'{safe}.png'
+
+
+def plots_from_registry(registry, data, code_col='SEHK_Code', date_col='date'):
+    """
+    Out-of-sample plots for every model in a model_registry, re-scored on the rows after
+    each model's training window.
+
+    Returns:
+    dict: code -> plot dict for render_report
+    """
+    prepared = prepare_ridge_data(data, code_col=code_col, date_col=date_col)
+    plots = {}
+    for code, sub in prepared.groupby(code_col, sort=True, observed=True):
+        record = registry.get(code)
+        if record is None:
+            continue
+        test = sub.iloc[record['n_train']:]
+        X = test[record['feature_names']].to_numpy(dtype=np.float64)
+        plots[code] = {
+            'title': f'ATM Volatility Prediction (SEHK {code})',
+            'dates': test[date_col].to_numpy(),
+            'y_true': test[TARGET].to_numpy(),
+            'y_pred': X @ np.asarray(record['coef']) + record['intercept'],
+            'metrics': {'Best alpha': record.get('best_alpha'), 'Test MSE': record.get('mse')},
+        }
+    return plots
+
+
+def render_report(plots, report_dir=DEFAULT_REPORT_DIR, max_workers=None, title='ATM Volatility Forecasts'):
+    """
+    Render plots to PNGs across a process pool and write an index.html linking them.
+
+    Parameters:
+    plots (dict): name -> {'title', 'dates', 'y_true', 'y_pred', optional 'metrics' dict and
+                  'figsize'}; insertion order is the order on the index page
+    max_workers (int): Number of worker processes; 1 renders serially in this process,
+                       None uses one process per CPU
+
+    Returns:
+    list: Names of the plots that were (re)rendered
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    manifest_path = os.path.join(report_dir, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    hashes = {name: _plot_hash(plot) for name, plot in plots.items()}
+    stale = [name for name in plots
+             if manifest.get(str(name)) != hashes[name]
+             or not os.path.exists(os.path.join(report_dir, _file_name(name)))]
+
+    if stale:
+        args = [(os.path.join(report_dir, _file_name(name)), plots[name]['dates'], plots[name]['y_true'],
+                 plots[name]['y_pred'], plots[name]['title'], plots[name].get('figsize', (7, 4)))
+                for name in stale]
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = min(max_workers, len(stale))
+        if max_workers <= 1:
+            for a in args:
+                _render_plot(*a)
+        else:
+            chunksize = max(1, len(args) // (max_workers * 4))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(_render_plot, *zip(*args), chunksize=chunksize))
+
+    _write_index(plots, report_dir, title)
+    manifest = {str(name): hashes[name] for name in plots}
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    print(f"Rendered {len(stale)} of {len(plots)} plots into {report_dir}")
+    return stale
+
+
+def _format_metric(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ''
+    return f'{value:.4f}' if isinstance(value, (float, np.floating)) else html.escape(str(value))
+
+
+def _write_index(plots, report_dir, title):
+    metric_names = list(dict.fromkeys(k for plot in plots.values() for k in plot.get('metrics', {})))
+    header = ''.join(f'<th>{html.escape(m)}</th>' for m in ['Plot'] + metric_names)
+    rows, figures = [], []
+    for name, plot in plots.items():
+        anchor = html.escape(str(name))
+        metrics = plot.get('metrics', {})
+        cells = ''.join(f'<td>{_format_metric(metrics.get(m))}</td>' for m in metric_names)
+        rows.append(f'<tr><td><a href="#{anchor}">{anchor}</a></td>{cells}</tr>')
+        figures.append(f'<h2 id="{anchor}">{html.escape(plot["title"])}</h2>'
+                       f'<img src="{_file_name(name)}" alt="{anchor}">')
+    page = (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            '<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}'
+            'td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}img{max-width:100%}</style>'
+            f'</head><body><h1>{html.escape(title)}</h1>'
+            f'<p>Generated {pd.Timestamp.now():%Y-%m-%d %H:%M}</p>'
+            f'<table><tr>{header}</tr>{"".join(rows)}</table>{"".join(figures)}</body></html>')
+    path = os.path.join(report_dir, 'index.html')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(page)
+    os.replace(path + '.tmp', path)
@@ -0,0 +1,205 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from iv_engine import DAYS_PER_YEAR
+from option_codes import OPTION_CODES
+
+# Batched Black-Scholes Greeks for whole SOM option chains and OI-weighted exposure.
+#
+# Greeks are taken with respect to spot, which is recovered from the chain forward as
+# S = F * exp(-(r - q) * T). Exposure follows the usual dealer convention: customers are
+# assumed long calls and short puts, so dealers are short call gamma and long put gamma,
+# and gamma exposure is reported as the dollar delta change for a 1% move in spot.
+
+DEFAULT_CACHE_DIR = 'greeks_cache'
+OI_COLUMN = 'net'  # Net open interest from the SOM report
+
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+
+def compute_greeks(ivs, rate=0.0, dividend_yield=0.0, contract_sizes=None):
+    """
+    Delta, gamma, vega and theta of every option in one batch.
+
+    Parameters:
+    ivs (pandas.DataFrame): Output of iv_engine.chain_implied_vols
+    rate (float): Continuously compounded interest rate used for the implied vols
+    dividend_yield (float): Continuous dividend yield
+    contract_sizes (dict): Shares per contract by underlying code; 1 where missing
+
+    Returns:
+    pandas.DataFrame: ivs with 'spot', 'delta', 'gamma', 'vega' (per vol point), 'theta'
+                      (per calendar day), 'contract_size', 'delta_exposure' and 'gamma_exposure'
+    """
+    result = ivs.copy()
+    forward = result['forward'].to_numpy(dtype=np.float64)
+    strike = result['strike'].to_numpy(dtype=np.float64)
+    t = result['t'].to_numpy(dtype=np.float64)
+    sigma = result['iv'].to_numpy(dtype=np.float64)
+    is_call = (result['right'] == 'C').to_numpy()
+
+    spot = forward * np.exp(-(rate - dividend_yield) * t)
+    carry = np.exp(-dividend_yield * t)
+    discount = np.exp(-rate * t)
+    sqrt_t = np.sqrt(t)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(forward / strike) + 0.5 * sigma * sigma * t) / (sigma * sqrt_t)
+        d2 = d1 - sigma * sqrt_t
+        pdf = np.exp(-0.5 * d1 * d1) / _SQRT_2PI
+
+        sign = np.where(is_call, 1.0, -1.0)
+        delta = carry * np.where(is_call, ndtr(d1), ndtr(d1) - 1.0)
+        gamma = carry * pdf / (spot * sigma * sqrt_t)
+        vega = spot * carry * pdf * sqrt_t / 100.0
+        theta = (-spot * carry * pdf * sigma / (2.0 * sqrt_t)
+                 - sign * rate * strike * discount * ndtr(sign * d2)
+                 + sign * dividend_yield * spot * carry * ndtr(sign * d1)) / DAYS_PER_YEAR
+
+    sizes = pd.Series(contract_sizes or {}, dtype=np.float64)
+    size = result['underlying'].astype(str).map(sizes).fillna(1.0).to_numpy()
+    oi = result[OI_COLUMN].to_numpy(dtype=np.float64) * size
+
+    result['spot'] = spot
+    result['delta'] = delta
+    result['gamma'] = gamma
+    result['vega'] = vega
+    result['theta'] = theta
+    result['contract_size'] = size
+    # Dealer positioning: short customer calls, long customer puts
+    result['delta_exposure'] = -sign * delta * oi * spot
+    result['gamma_exposure'] = -sign * gamma * oi * spot * spot * 0.01
+    return result
+
+
+def exposure_by_strike(greeks):
+    """
+    OI-weighted exposure per (date, underlying, strike), summed over expiries.
+
+    Returns:
+    pandas.DataFrame: date, underlying, strike, call_gamma_exposure, put_gamma_exposure,
+                      gamma_exposure (net), delta_exposure, call_oi and put_oi
+    """
+    valid = greeks[greeks['gamma'].notna()]
+    keys = ['date', 'underlying', 'strike']
+    by_right = valid.pivot_table(index=keys, columns='right', values=['gamma_exposure', OI_COLUMN],
+                                 aggfunc='sum', fill_value=0.0)
+    by_right = by_right.reindex(columns=pd.MultiIndex.from_product(
+        [['gamma_exposure', OI_COLUMN], ['C', 'P']]), fill_value=0.0)
+
+    profile = pd.DataFrame({
+        'call_gamma_exposure': by_right[('gamma_exposure', 'C')],
+        'put_gamma_exposure': by_right[('gamma_exposure', 'P')],
+        'call_oi': by_right[(OI_COLUMN, 'C')],
+        'put_oi': by_right[(OI_COLUMN, 'P')],
+    })
+    profile['gamma_exposure'] = profile['call_gamma_exposure'] + profile['put_gamma_exposure']
+    profile['delta_exposure'] = valid.groupby(keys)['delta_exposure'].sum()
+    return profile.reset_index()
+
+
+def exposure_by_underlying(profile):
+    """Total exposure per (date, underlying) from a per-strike profile."""
+    columns = ['call_gamma_exposure', 'put_gamma_exposure', 'gamma_exposure', 'delta_exposure',
+               'call_oi', 'put_oi']
+    return profile.groupby(['date', 'underlying'], as_index=False)[columns].sum()
+
+
+def _cache_file(cache_dir, date):
+    return os.path.join(cache_dir, f"exposure_{pd.Timestamp(date):%Y%m%d}.pkl")
+
+
+def cached_dates(cache_dir=DEFAULT_CACHE_DIR):
+    """Sorted dates (pandas.Timestamp) that have an exposure profile in the cache."""
+    if not os.path.isdir(cache_dir):
+        return []
+    return [pd.Timestamp(name[9:17]) for name in sorted(os.listdir(cache_dir))
+            if name.startswith('exposure_') and name.endswith('.pkl')]
+
+
+def update_exposure_cache(ivs, cache_dir=DEFAULT_CACHE_DIR, rate=0.0, dividend_yield=0.0,
+                          contract_sizes=None, overwrite=False):
+    """
+    Compute and cache the per-strike exposure profile of every date in ivs not cached yet.
+
+    Returns the list of dates written.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    dates = pd.to_datetime(ivs['date']).dt.normalize()
+    pending = [d for d in dates.unique()
+               if overwrite or not os.path.exists(_cache_file(cache_dir, d))]
+    if not pending:
+        return []
+
+    greeks = compute_greeks(ivs[dates.isin(pending)], rate, dividend_yield, contract_sizes)
+    for date, day in exposure_by_strike(greeks).groupby('date'):
+        path = _cache_file(cache_dir, date)
+        day.reset_index(drop=True).to_pickle(path + '.tmp')
+        os.replace(path + '.tmp', path)
+    print(f"Cached exposure for {len(pending)} date(s) in {cache_dir}")
+    return sorted(pd.Timestamp(d) for d in pending)
+
+
+class ExposureTable:
+    """
+    Precomputed daily exposure for the dashboards.
+
+    Each day's per-strike profile is read from the cache once and indexed by underlying,
+    so strike profiles for charting are a dictionary lookup.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._days = {}
+
+    def dates(self):
+        return cached_dates(self.cache_dir)
+
+    def _day(self, date=None):
+        if date is None:
+            dates = self.dates()
+            if not dates:
+                return {}
+            date = dates[-1]
+        date = pd.Timestamp(date)
+        if date not in self._days:
+            path = _cache_file(self.cache_dir, date)
+            if not os.path.exists(path):
+                return {}
+            profile = pd.read_pickle(path)
+            self._days[date] = {str(u): frame.reset_index(drop=True)
+                                for u, frame in profile.groupby('underlying')}
+        return self._days[date]
+
+    def strike_profile(self, underlying, date=None):
+        """Per-strike exposure of one underlying; the latest cached date by default."""
+        return self._day(date).get(str(underlying), pd.DataFrame())
+
+    def totals(self, date=None):
+        """Exposure per underlying for one date; the latest cached date by default."""
+        day = self._day(date)
+        if not day:
+            return pd.DataFrame()
+        return exposure_by_underlying(pd.concat(day.values(), ignore_index=True))
+
+    def clear(self):
+        self._days.clear()
+
+
+def with_exposure(tickers_data, code_column='SEHK Code', cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Add 'Gamma Exposure' and 'Delta Exposure' columns (net dealer exposure, latest cached
+    date) to a summary table; the table is returned unchanged when no exposure is cached.
+    """
+    totals = ExposureTable(cache_dir).totals()
+    if totals.empty:
+        return tickers_data
+    totals = totals.set_index(totals['underlying'].astype(str))
+    codes = tickers_data[code_column].astype(str)
+    codes = codes.map(OPTION_CODES).fillna(codes)
+    tickers_data = tickers_data.copy()
+    tickers_data['Gamma Exposure'] = codes.map(totals['gamma_exposure']).round(0)
+    tickers_data['Delta Exposure'] = codes.map(totals['delta_exposure']).round(0)
+    return tickers_data
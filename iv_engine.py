@@ -0,0 +1,255 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from som_chain_store import chains_to_long
+
+# Vectorized Black-Scholes implied volatility for whole SOM option chains.
+#
+# Prices are handled in forward (Black-76) terms: with F = S * exp((r - q) * T) and the
+# discount factor DF = exp(-r * T) this is the same as Black-Scholes with a dividend yield.
+# Puts are converted to calls by put-call parity, so one solver covers both sides.
+
+MIN_TICK = 0.01
+DAYS_PER_YEAR = 365.0
+SIGMA_LOW = 1e-4
+SIGMA_HIGH = 5.0
+
+DEFAULT_ATM_VOL_PATH = 'atm_vol_daily.pkl'  # Persisted atm_vol_table, next to vol_stats' state
+
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def black_call(forward, strike, t, sigma):
+    """Undiscounted Black-76 call price."""
+    sqrt_t = np.sqrt(t)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(forward / strike) + 0.5 * sigma * sigma * t) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
+    return forward * ndtr(d1) - strike * ndtr(d2)
+
+
+def _initial_guess(call, forward, strike, t):
+    """
+    Corrado-Miller starting point for the undiscounted call price, falling back to
+    Brenner-Subrahmanyam where its square root goes negative.
+    """
+    half_moneyness = 0.5 * (forward - strike)
+    inner = (call - half_moneyness) ** 2 - (forward - strike) ** 2 / np.pi
+    with np.errstate(invalid='ignore'):
+        corrado_miller = _SQRT_2PI / (forward + strike) * (call - half_moneyness + np.sqrt(inner)) / np.sqrt(t)
+    brenner = _SQRT_2PI * call / (forward * np.sqrt(t))
+    guess = np.where(inner > 0, corrado_miller, brenner)
+    return np.clip(np.nan_to_num(guess, nan=0.3), SIGMA_LOW * 10, SIGMA_HIGH / 2)
+
+
+def implied_vol(price, forward, strike, t, discount=1.0, is_call=True, min_tick=MIN_TICK,
+                tol=1e-10, max_iter=60):
+    """
+    Implied volatility of many options at once.
+
+    Newton steps are taken on every option together; any option whose Newton step would
+    leave its current bracket, or whose vega is too small to trust, takes a bisection step
+    instead, so every option converges. Options without a meaningful volatility are NaN:
+    non-positive time, prices at or below the minimum tick, and prices outside the
+    no-arbitrage bounds or within one tick of intrinsic value.
+
+    Parameters:
+    price (array): Option prices (e.g. settle prices)
+    forward, strike, t (array): Forward price, strike and time to expiry in years
+    discount (array): Discount factor exp(-r * t)
+    is_call (array of bool): True for calls, False for puts
+    min_tick (float): Minimum price increment of the report
+
+    Returns:
+    numpy.ndarray: Implied volatilities as decimals
+    """
+    price, forward, strike, t, discount, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=np.float64), np.asarray(forward, dtype=np.float64),
+        np.asarray(strike, dtype=np.float64), np.asarray(t, dtype=np.float64),
+        np.asarray(discount, dtype=np.float64), np.asarray(is_call, dtype=bool),
+    )
+
+    # Undiscounted call-equivalent price: C = P + DF * (F - K) by put-call parity
+    with np.errstate(invalid='ignore', divide='ignore'):
+        undiscounted = price / discount
+        call = np.where(is_call, undiscounted, undiscounted + forward - strike)
+        intrinsic = np.maximum(forward - strike, 0.0)
+        tick = min_tick / discount
+
+    valid = (
+        np.isfinite(call) & np.isfinite(forward) & (forward > 0) & (strike > 0) & (t > 0)
+        & (price > min_tick)
+        & (call > intrinsic + tick)  # Within a tick of intrinsic there is no time value to read
+        & (call < forward)
+    )
+
+    iv = np.full(price.shape, np.nan)
+    if not valid.any():
+        return iv
+
+    c, f, k, tt = call[valid], forward[valid], strike[valid], t[valid]
+    sigma = _initial_guess(c, f, k, tt)
+    low = np.full(c.shape, SIGMA_LOW)
+    high = np.full(c.shape, SIGMA_HIGH)
+    active = np.ones(c.shape, dtype=bool)
+
+    for _ in range(max_iter):
+        s = sigma[active]
+        fa, ka, ta = f[active], k[active], tt[active]
+        diff = black_call(fa, ka, ta, s) - c[active]
+
+        # The call price increases with sigma, so the sign of diff tightens the bracket
+        lo_a = np.where(diff < 0, s, low[active])
+        hi_a = np.where(diff > 0, s, high[active])
+
+        sqrt_t = np.sqrt(ta)
+        d1 = (np.log(fa / ka) + 0.5 * s * s * ta) / (s * sqrt_t)
+        vega = fa * _norm_pdf(d1) * sqrt_t
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            step = diff / vega
+        newton = s - step
+        use_newton = (vega > 1e-12) & (newton > lo_a) & (newton < hi_a)
+        new_sigma = np.where(use_newton, newton, 0.5 * (lo_a + hi_a))
+
+        # Stop once sigma itself is pinned down, which also covers options with tiny vega
+        done = (diff == 0) | (use_newton & (np.abs(step) <= tol)) | (hi_a - lo_a <= tol)
+        sigma[active] = new_sigma
+        low[active] = lo_a
+        high[active] = hi_a
+
+        idx = np.flatnonzero(active)
+        active[idx[done]] = False
+        if not active.any():
+            break
+
+    iv[valid] = sigma
+    return iv
+
+
+def implied_forwards(chains, discount, min_tick=MIN_TICK):
+    """
+    Forward per (date, underlying, expiry) from put-call parity, F = K + (C - P) / DF, at
+    the strike where call and put prices are closest.
+
+    Parameters:
+    chains (pandas.DataFrame): Long rows as built by som_chain_store.chains_to_long
+    discount (pandas.Series): Discount factor per row of chains
+
+    Returns:
+    pandas.Series: Forward indexed by (date, underlying, expiry)
+    """
+    keys = ['date', 'underlying', 'expiry', 'strike']
+    rows = chains[keys].assign(settle=chains['settle'], discount=discount)
+    calls = rows[chains['right'] == 'C'].set_index(keys)
+    puts = rows[chains['right'] == 'P'].set_index(keys)
+    calls = calls[~calls.index.duplicated()]
+    puts = puts[~puts.index.duplicated()]
+    pairs = calls.join(puts[['settle']], rsuffix='_put', how='inner')
+    pairs = pairs[(pairs['settle'] > min_tick) & (pairs['settle_put'] > min_tick)]
+    if pairs.empty:
+        return pd.Series(dtype=np.float64, index=pd.MultiIndex.from_tuples([], names=keys[:3]))
+
+    pairs['gap'] = (pairs['settle'] - pairs['settle_put']).abs()
+    best = pairs.loc[pairs.groupby(level=[0, 1, 2])['gap'].idxmin()]
+    strikes = best.index.get_level_values('strike').to_numpy()
+    forward = strikes + (best['settle'] - best['settle_put']).to_numpy() / best['discount'].to_numpy()
+    return pd.Series(forward, index=best.index.droplevel('strike'), name='forward')
+
+
+def chain_implied_vols(chains, spots=None, rate=0.0, dividend_yield=0.0, min_tick=MIN_TICK):
+    """
+    Implied volatility of every call and put in a set of parsed chains in one batch.
+
+    Parameters:
+    chains (pandas.DataFrame): Long rows from som_chain_store.chains_to_long (or OptionChainStore.frame)
+    spots (dict or pandas.Series): Spot per underlying, or per (date, underlying). If omitted
+                                   the forward is implied from put-call parity per expiry
+    rate (float): Continuously compounded interest rate (e.g. HIBOR for the tenor)
+    dividend_yield (float): Continuous dividend yield, used only with spots
+
+    Returns:
+    pandas.DataFrame: chains with 't', 'forward', 'moneyness' (strike / forward) and 'iv' columns
+    """
+    result = chains.copy()
+    dates = pd.to_datetime(result['date'])
+    expiries = pd.to_datetime(result['expiry'])
+    result['t'] = (expiries - dates).dt.days.to_numpy() / DAYS_PER_YEAR
+    discount = np.exp(-rate * result['t'])
+
+    if spots is None:
+        forwards = implied_forwards(result, discount, min_tick)
+        index = pd.MultiIndex.from_frame(result[['date', 'underlying', 'expiry']])
+        result['forward'] = forwards.reindex(index).to_numpy()
+    else:
+        spots = pd.Series(spots)
+        if spots.index.nlevels == 2:
+            index = pd.MultiIndex.from_frame(result[['date', 'underlying']])
+        else:
+            index = pd.Index(result['underlying'].astype(str))
+        spot = spots.reindex(index).to_numpy(dtype=np.float64)
+        result['forward'] = spot * np.exp((rate - dividend_yield) * result['t'])
+
+    result['moneyness'] = result['strike'] / result['forward']
+    result['iv'] = implied_vol(
+        result['settle'].to_numpy(dtype=np.float64),
+        result['forward'].to_numpy(),
+        result['strike'].to_numpy(dtype=np.float64),
+        result['t'].to_numpy(),
+        discount.to_numpy(),
+        (result['right'] == 'C').to_numpy(),
+        min_tick=min_tick,
+    )
+    return result
+
+
+def atm_vol_table(ivs, low=0.95, high=1.05):
+    """
+    Daily ATM volatility per underlying: mean IV of options with strike / forward in
+    [low, high], in percent, in the Ticker / Date / ATM_Vol layout used by atm_vol.py.
+    """
+    atm = ivs[(ivs['moneyness'] >= low) & (ivs['moneyness'] <= high) & ivs['iv'].notna()]
+    table = atm.groupby(['underlying', 'date'], observed=True)['iv'].mean().mul(100).reset_index()
+    table.columns = ['Ticker', 'Date', 'ATM_Vol']
+    table['Ticker'] = table['Ticker'].astype(str)
+    table['ATM_Vol'] = table['ATM_Vol'].round(2)
+    return table
+
+
+def update_atm_vol_history(chains, path=DEFAULT_ATM_VOL_PATH, rate=0.0, low=0.95, high=1.05):
+    """
+    Persisted atm_vol_table of a SOM archive, solving implied vols only for dates after
+    the last one saved, so a restart does not re-solve the whole archive. Earlier dates
+    are assumed unchanged; delete the file to rebuild after corrections.
+
+    Parameters:
+    chains (pandas.DataFrame): parse_som_reports output, or long rows from chains_to_long
+    path (str): Pickle the table is persisted to; None computes everything in memory
+
+    Returns:
+    pandas.DataFrame: The full Ticker / Date / ATM_Vol table
+    """
+    history = pd.read_pickle(path) if path is not None and os.path.exists(path) else None
+    dates = pd.to_datetime(chains['date'])
+    if history is not None and not history.empty:
+        chains = chains[(dates > pd.Timestamp(history['Date'].max())).to_numpy()]
+    if chains.empty:
+        return history if history is not None else atm_vol_table(pd.DataFrame(
+            columns=['underlying', 'date', 'iv', 'moneyness']), low, high)
+
+    if 'right' not in chains.columns:
+        chains = chains_to_long(chains)
+    table = atm_vol_table(chain_implied_vols(chains, rate=rate), low, high)
+    if history is not None:
+        table = pd.concat([history, table], ignore_index=True)
+        table = table.sort_values(['Ticker', 'Date'], kind='mergesort', ignore_index=True)
+    if path is not None:
+        table.to_pickle(path + '.tmp')
+        os.replace(path + '.tmp', path)
+    return table
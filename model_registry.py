@@ -0,0 +1,179 @@
+import argparse
+import hashlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Ridge
+
+from ridge_batch import FEATURES, TARGET, prepare_ridge_data, ridge_cv
+from vol_scoring import ForecastTable
+
+# Per-code ridge training across a process pool with an on-disk model registry.
+#
+# Every model is stored with the SHA-256 of the rows it was trained on. A re-run hashes
+# each code's prepared rows again and only retrains codes whose hash changed, so adding a
+# day of data for a few codes only retrains those codes. All records live in one pickle,
+# so the dashboards load the whole registry with a single read.
+
+DEFAULT_REGISTRY_DIR = 'model_registry'
+REGISTRY_FILE = 'models.pkl'
+DEFAULT_ALPHAS = np.logspace(-3, 2, 10)  # Same grid as ridge_regr2.py
+
+
+def data_hash(sub, features=FEATURES, date_col='date'):
+    """SHA-256 of one code's prepared rows (dates, features and target)."""
+    columns = [date_col] + list(features) + [TARGET]
+    hashed = pd.util.hash_pandas_object(sub[columns], index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+
+def _train_code(code, dates, X, y, alphas, n_splits=5, test_size=0.2):
+    """
+    Worker: ridge_regr2.py's model for one code - a fit on the first (1 - test_size) of the
+    rows and the MSE on the rest. Unlike the script, which cross-validates over all rows,
+    alpha is chosen by time-series CV on the training rows only, so the test rows do not
+    leak into the choice and best alphas can differ from the script's.
+
+    Returns:
+    dict or None: The registry record (without hash and version), or None with too few rows
+    """
+    n = len(y)
+    n_train = int(n * (1 - test_size))
+    if n_train <= n_splits or n_train >= n:
+        return None
+    best_alpha, cv_mse, _ = ridge_cv(X[:n_train], y[:n_train], alphas, n_splits=n_splits)
+
+    model = Ridge(alpha=best_alpha)
+    model.fit(X[:n_train], y[:n_train])
+    y_pred = model.predict(X[n_train:])
+    return {
+        'code': code,
+        'model': model,
+        'best_alpha': float(best_alpha),
+        'cv_mse': float(cv_mse),
+        'mse': float(np.mean((y[n_train:] - y_pred) ** 2)),
+        'coef': model.coef_,
+        'intercept': float(model.intercept_),
+        'train_start': pd.Timestamp(dates[0]),
+        'train_end': pd.Timestamp(dates[n_train - 1]),
+        'test_end': pd.Timestamp(dates[-1]),
+        'n_train': n_train,
+        'n_test': n - n_train,
+    }
+
+
+def load_registry(registry_dir=DEFAULT_REGISTRY_DIR):
+    """All saved records as {code: record}; empty if nothing has been trained yet."""
+    path = os.path.join(registry_dir, REGISTRY_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def save_registry(registry, registry_dir=DEFAULT_REGISTRY_DIR):
+    """Write all records atomically."""
+    os.makedirs(registry_dir, exist_ok=True)
+    path = os.path.join(registry_dir, REGISTRY_FILE)
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(registry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+
+
+def train_models(df, registry_dir=DEFAULT_REGISTRY_DIR, alphas=DEFAULT_ALPHAS, max_workers=None,
+                 data_version=None, features=FEATURES, code_col='SEHK_Code', date_col='date',
+                 force=False):
+    """
+    Train a model per code and save it to the registry, skipping codes whose data is unchanged.
+
+    Parameters:
+    df (pandas.DataFrame or FeatureStore): Rows with code_col, date_col, 'ATM_vol' and the
+                                           feature columns, or a feature store to read them from
+    max_workers (int): Number of worker processes; 1 trains serially in this process,
+                       None uses one process per CPU
+    data_version: Recorded with every model trained in this run, e.g. the store's
+                  dqe_store.read_version()['version']
+    force (bool): Retrain every code
+
+    Returns:
+    dict: The full registry after the run, {code: record}
+    """
+    features = list(features)
+    registry = load_registry(registry_dir)
+    data = prepare_ridge_data(df, features, code_col, date_col)
+
+    # Models of codes no longer in the data would keep being scored and plotted
+    present = set(data[code_col].unique())
+    stale = [code for code in registry if code not in present]
+    for code in stale:
+        del registry[code]
+
+    jobs, hashes = [], {}
+    for code, sub in data.groupby(code_col, sort=True, observed=True):
+        digest = data_hash(sub, features, date_col)
+        if not force and code in registry and registry[code]['data_hash'] == digest:
+            continue
+        hashes[code] = digest
+        jobs.append((code, sub[date_col].to_numpy(), sub[features].to_numpy(dtype=np.float64),
+                     sub[TARGET].to_numpy(dtype=np.float64)))
+
+    print(f"Training {len(jobs)} of {data[code_col].nunique()} codes "
+          f"({data[code_col].nunique() - len(jobs)} unchanged, {len(stale)} dropped)")
+    if not jobs:
+        if stale:
+            save_registry(registry, registry_dir)
+        return registry
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(jobs))
+    codes, dates, Xs, ys = zip(*jobs)
+    alphas_list = [np.asarray(alphas)] * len(jobs)
+
+    if max_workers <= 1:
+        records = list(map(_train_code, codes, dates, Xs, ys, alphas_list))
+    else:
+        # A few chunks per worker keeps the pool busy without paying per-code IPC overhead
+        chunksize = max(1, len(jobs) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            records = list(executor.map(_train_code, codes, dates, Xs, ys, alphas_list, chunksize=chunksize))
+
+    trained_at = datetime.now().isoformat(timespec='seconds')
+    for code, record in zip(codes, records):
+        if record is None:
+            print(f"SEHK {code}: not enough rows to train, skipped")
+            registry.pop(code, None)
+            continue
+        record.update(feature_names=features, data_hash=hashes[code], data_version=data_version,
+                      trained_at=trained_at)
+        registry[code] = record
+        print(f"SEHK {code}: best alpha={record['best_alpha']:.4f}, test MSE={record['mse']:.4f}")
+    save_registry(registry, registry_dir)
+    return registry
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train per-code ridge models into the model registry.")
+    parser.add_argument('data', help="Pickled DataFrame with date, SEHK_Code, ATM_vol and the feature columns")
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY_DIR, help="Registry directory")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--data-version', default=None, help="Data version recorded with the models")
+    parser.add_argument('--force', action='store_true', help="Retrain codes whose data is unchanged")
+    parser.add_argument('--forecasts', default=None,
+                        help="Also score the latest rows into this forecast table (see vol_scoring.py)")
+    parser.add_argument('--report', default=None,
+                        help="Also render the out-of-sample plots into this report directory (see forecast_report.py)")
+    args = parser.parse_args()
+
+    data = pd.read_pickle(args.data)
+    registry = train_models(data, args.registry, max_workers=args.workers,
+                            data_version=args.data_version, force=args.force)
+    if args.forecasts:
+        ForecastTable(args.forecasts).refresh(registry, data)
+    if args.report:
+        from forecast_report import plots_from_registry, render_report
+        render_report(plots_from_registry(registry, data), args.report, max_workers=args.workers)
@@ -1,10 +1,17 @@
 import os
+import time
 import dash
 from dash import dcc, html, Input, Output, State, dash_table
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import pandas as pd
 
+from dqe_cache import TickerCache
+from dqe_store import DEFAULT_STORE_PATH, list_tickers, read_version
+from greeks_engine import with_exposure
+from skew_engine import with_real_skew
+from vol_scoring import with_forecasts
+
 # ------------------------
 # Load Data for Both Screens
 # ------------------------
@@ -16,6 +23,12 @@ tickers_data = pd.DataFrame([
     {'SEHK Code': '0700', 'Open Interest': 250000, 'Skew': 0.63, 'Identifier': 'TENCENT', 'Notional traded': 8000000},
     {'SEHK Code': '2318', 'Open Interest': 170000, 'Skew': 0.21, 'Identifier': 'PING AN', 'Notional traded': 4200000},
 ])
+# Real 25-delta risk reversals from the skew cache, where one has been built
+tickers_data = with_real_skew(tickers_data)
+# Net dealer gamma and delta exposure from the greeks cache, where one has been built
+tickers_data = with_exposure(tickers_data)
+# Current and model-predicted next-day ATM vol from the cached forecast table
+tickers_data = with_forecasts(tickers_data)
 upside_data = pd.DataFrame([
     {'SEHK Code': '0700', 'Signal': 'Strong', 'Score': 9.1},
     {'SEHK Code': '0001', 'Signal': 'Moderate', 'Score': 7.5},
@@ -25,11 +38,18 @@ downside_data = pd.DataFrame([
     {'SEHK Code': '2318', 'Signal': 'Moderate', 'Score': 5.0},
 ])
 
-# Real data for Screen 2
-df2 = pd.read_pickle('processed_data.pkl')
-tickers2 = df2.columns.get_level_values('ticker').unique()
+# Real data for Screen 2, read per callback from the date-partitioned DQE store
+STORE_PATH = DEFAULT_STORE_PATH
+tickers2 = pd.Index(list_tickers(STORE_PATH))
 default_tickers2 = tickers2[:10]
 
+# Tickers are read on first view and kept in a bounded LRU; the defaults load in the background
+cache2 = TickerCache(STORE_PATH, max_tickers=64)
+cache2.prefetch(default_tickers2)
+
+# Data version published by dqe_watch.py that cache2 was loaded from
+loaded_version2 = (read_version(STORE_PATH) or {}).get('version')
+
 # ------------------------
 # App and Layout
 # ------------------------
@@ -103,6 +123,8 @@ app.layout = dbc.Container([
         dbc.Tab(label="Screen 3", tab_id="screen3", label_style={"fontWeight": "bold", "fontSize": 18}),
     ], id="tabs", active_tab="summary", class_name="mb-4"),
     html.Div(id="tab-content"),
+    dcc.Interval(id='data-version-poll', interval=2000),
+    dcc.Store(id='data-version', data=loaded_version2),
 ], fluid=True)
 
 # ------------------------
@@ -146,18 +168,38 @@ def render_tab_content(active_tab):
 # Callbacks for Screen 2 (metrics)
 # ------------------------
 
+# Hot-swap Screen 2 data when the ingest service publishes a new version
+@app.callback(
+    Output('data-version', 'data'),
+    Input('data-version-poll', 'n_intervals'),
+    State('data-version', 'data'),
+)
+def poll_data_version(n_intervals, client_version):
+    global tickers2, loaded_version2
+    info = read_version(STORE_PATH)
+    if info is None or info['version'] == client_version:
+        return dash.no_update
+    if info['version'] != loaded_version2:
+        tickers2 = pd.Index(list_tickers(STORE_PATH))
+        cache2.clear()
+        cache2.prefetch(default_tickers2)
+        loaded_version2 = info['version']
+        if info.get('landed_at'):
+            print(f"Data version {loaded_version2} visible {time.time() - info['landed_at']:.2f}s after the file landed")
+    return info['version']
+
 # Update graphs for default tickers
 @app.callback(
     [Output(f'ticker-graph-{ticker}', 'figure') for ticker in default_tickers2],
     Input('metric-dropdown', 'value'),
+    Input('data-version', 'data'),
     prevent_initial_call=False
 )
-def update_default_graphs(selected_metric):
+def update_default_graphs(selected_metric, data_version):
     figures = []
     for ticker in default_tickers2:
         try:
-            data = df2[(ticker, selected_metric)].reset_index()
-            data.columns = ['date', selected_metric]
+            data = cache2.series_frame(ticker, selected_metric)
             fig = px.line(
                 data, x='date', y=selected_metric,
                 title=f'{ticker} - {selected_metric.replace("_", " ").title()}',
@@ -179,18 +221,21 @@ def update_default_graphs(selected_metric):
     Output('search-graph', 'figure'),
     Output('search-result', 'children'),
     Input('search-button', 'n_clicks'),
+    Input('data-version', 'data'),
     State('ticker-search', 'value'),
     State('metric-dropdown', 'value'),
     prevent_initial_call=True
 )
-def update_search_graph(n_clicks, search_ticker, selected_metric):
+def update_search_graph(n_clicks, data_version, search_ticker, selected_metric):
     if not search_ticker:
         return px.line(), "Enter a ticker and click Search."
     search_ticker = search_ticker.upper().strip()
     if search_ticker not in tickers2:
         return px.line(), f"Ticker {search_ticker} not found."
-    data = df2[(search_ticker, selected_metric)].reset_index()
-    data.columns = ['date', selected_metric]
+    try:
+        data = cache2.series_frame(search_ticker, selected_metric)
+    except KeyError:  # Listed, but removed from the store since the list was read
+        return px.line(), f"Ticker {search_ticker} not found."
     fig = px.line(
         data, x='date', y=selected_metric,
         title=f'{search_ticker} - {selected_metric.replace("_", " ").title()}',
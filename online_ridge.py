@@ -0,0 +1,166 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from ridge_batch import FEATURES
+
+# Online ridge regression of next-day ATM_vol for every SEHK code at once.
+#
+# Each code keeps exponentially weighted sufficient statistics: the total weight, the
+# feature and target means, and the centred co-moments Cxx and Cxy. A new observation
+# (x, y) with forgetting factor lam updates them in O(features^2):
+#
+#     W' = lam * W + 1,  d = x - mean,  mean' = mean + d / W'
+#     C' = lam * C + (lam * W / W') * d d'
+#
+# and the ridge solution is w = (Cxx + alpha I)^-1 Cxy with intercept ybar - xbar'w. With
+# lam = 1 this is exactly sklearn's Ridge(alpha) fitted on all rows seen so far; lam < 1
+# down-weights old days by lam per day. The updates and the solve are batched over codes.
+
+DEFAULT_STATE_PATH = 'online_ridge.pkl'
+
+
+class OnlineRidge:
+    """
+    Parameters:
+    alpha (float): Ridge penalty (on the features, not the intercept, as in sklearn)
+    forgetting (float): Weight kept by the existing statistics per new day; 1 keeps everything
+    features (list): Feature columns
+    """
+
+    def __init__(self, alpha=1.0, forgetting=1.0, features=FEATURES):
+        self.alpha = alpha
+        self.forgetting = forgetting
+        self.features = list(features)
+        self.codes = []
+        self._rows = {}
+        n_features = len(self.features)
+        self.last_date = None
+        self._weight = np.zeros(0)
+        self._x_mean = np.zeros((0, n_features))
+        self._y_mean = np.zeros(0)
+        self._cxx = np.zeros((0, n_features, n_features))
+        self._cxy = np.zeros((0, n_features))
+        self._pending = np.zeros((0, n_features))  # Yesterday's features, awaiting today's ATM_vol
+        self.coef = np.zeros((0, n_features))
+        self.intercept = np.zeros(0)
+
+    def _add_codes(self, codes):
+        new = [c for c in codes if c not in self._rows]
+        if not new:
+            return
+        for c in new:
+            self._rows[c] = len(self.codes)
+            self.codes.append(c)
+        k, p = len(new), len(self.features)
+        self._weight = np.concatenate([self._weight, np.zeros(k)])
+        self._x_mean = np.vstack([self._x_mean, np.zeros((k, p))])
+        self._y_mean = np.concatenate([self._y_mean, np.zeros(k)])
+        self._cxx = np.concatenate([self._cxx, np.zeros((k, p, p))])
+        self._cxy = np.vstack([self._cxy, np.zeros((k, p))])
+        self._pending = np.vstack([self._pending, np.full((k, p), np.nan)])
+        self.coef = np.vstack([self.coef, np.full((k, p), np.nan)])
+        self.intercept = np.concatenate([self.intercept, np.full(k, np.nan)])
+
+    def _observe(self, rows, X, y):
+        """Fold one (x, y) pair per given row into the statistics."""
+        lam = self.forgetting
+        weight = lam * self._weight[rows]
+        new_weight = weight + 1.0
+        dx = X - self._x_mean[rows]
+        dy = y - self._y_mean[rows]
+        scale = (weight / new_weight)[:, None]
+
+        self._cxx[rows] = lam * self._cxx[rows] + scale[:, :, None] * dx[:, :, None] * dx[:, None, :]
+        self._cxy[rows] = lam * self._cxy[rows] + scale * dx * dy[:, None]
+        self._x_mean[rows] += dx / new_weight[:, None]
+        self._y_mean[rows] += dy / new_weight
+        self._weight[rows] = new_weight
+
+    def _solve(self, rows):
+        n_features = len(self.features)
+        coef = np.linalg.solve(self._cxx[rows] + self.alpha * np.eye(n_features), self._cxy[rows][..., None])[..., 0]
+        self.coef[rows] = coef
+        self.intercept[rows] = self._y_mean[rows] - np.einsum('gp,gp->g', self._x_mean[rows], coef)
+
+    def update(self, date, day, code_col='SEHK_Code'):
+        """
+        Append one day of rows (one per code) and return next-day ATM_vol forecasts.
+
+        Today's ATM_vol is the target for yesterday's features, so each code with features
+        pending from its previous day is updated with that pair; today's features are then
+        kept for tomorrow and used for the forecast.
+
+        Returns:
+        pandas.Series: Forecast of the next day's ATM_vol per code with complete features today
+        """
+        date = pd.Timestamp(date)
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"Day {date.date()} is not after the last day appended ({self.last_date.date()})")
+        day = day.drop_duplicates(code_col, keep='last')
+        codes = day[code_col].astype(str).tolist()
+        self._add_codes(codes)
+        rows = np.array([self._rows[c] for c in codes], dtype=np.int64)
+        X = day[self.features].to_numpy(dtype=np.float64)
+        y = day['ATM_vol'].to_numpy(dtype=np.float64)
+
+        pending = self._pending[rows]
+        learn = ~np.isnan(pending).any(axis=1) & ~np.isnan(y)
+        if learn.any():
+            self._observe(rows[learn], pending[learn], y[learn])
+            self._solve(rows[learn])
+
+        # Codes without a row today keep their pending features for their next row, pairing
+        # consecutive rows per code as shift(-1) does in the batch scripts
+        self._pending[rows] = X
+        self.last_date = date
+
+        ready = ~np.isnan(X).any(axis=1) & (self._weight[rows] > 0)
+        forecast = np.einsum('np,np->n', X[ready], self.coef[rows[ready]]) + self.intercept[rows[ready]]
+        return pd.Series(forecast, index=pd.Index(np.array(codes)[ready], name=code_col), name='ATM_vol_forecast')
+
+    def update_history(self, df, code_col='SEHK_Code', date_col='date'):
+        """
+        Append every day of df after last_date in date order.
+
+        Returns:
+        pandas.Series: The forecasts made on the last day appended (empty if nothing was new)
+        """
+        dates = pd.to_datetime(df[date_col])
+        if self.last_date is not None:
+            df, dates = df[dates > self.last_date], dates[dates > self.last_date]
+        forecast = pd.Series(dtype=np.float64, name='ATM_vol_forecast')
+        for date, day in df.groupby(dates, sort=True):
+            forecast = self.update(date, day, code_col)
+        return forecast
+
+    def forecast(self, day, code_col='SEHK_Code'):
+        """Next-day forecasts from given feature rows without changing the state."""
+        codes = day[code_col].astype(str)
+        known = codes.isin(self._rows).to_numpy()
+        rows = np.array([self._rows[c] for c in codes[known]], dtype=np.int64)
+        X = day.loc[known, self.features].to_numpy(dtype=np.float64)
+        forecast = np.einsum('np,np->n', X, self.coef[rows]) + self.intercept[rows]
+        return pd.Series(forecast, index=pd.Index(codes[known].to_numpy(), name=code_col), name='ATM_vol_forecast')
+
+    def coefficients(self):
+        """Current coefficients per code, with 'intercept' and the effective number of days 'weight'."""
+        table = pd.DataFrame(self.coef, index=pd.Index(self.codes, name='SEHK_Code'), columns=self.features)
+        table['intercept'] = self.intercept
+        table['weight'] = self._weight
+        return table
+
+    def save(self, path=DEFAULT_STATE_PATH):
+        """Persist the state atomically."""
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_STATE_PATH):
+        model = cls.__new__(cls)
+        with open(path, 'rb') as f:
+            model.__dict__.update(pickle.load(f))
+        return model
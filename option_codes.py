@@ -0,0 +1,7 @@
+# HKEX stock option codes of the SEHK codes used on the summary screens.
+#
+# Option-chain results (skew, exposure) are keyed by the underlying's option code as it
+# appears in the SOM report, while the dashboards list SEHK codes; every lookup from one to
+# the other goes through this table. Codes without an entry are used as they are.
+
+OPTION_CODES = {'0001': 'CKH', '0005': 'HKB', '0700': 'TCH', '2318': 'PAI'}
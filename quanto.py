@@ -1,15 +1,15 @@
 # Quanto forward hedging for energy market https://research-api.cbs.dk/ws/portalfiles/portal/45713609/nina_lange_pricing_and_hedging_quanto_options_publishersversion.pdf
 
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+
+from synthetic_data import spot_paths
 
 # Step 1: Load or generate historical data
 # Replace this synthetic data with your actual TAIEX and USD/TWD time series data
-np.random.seed(42)  # For reproducibility
 dates = pd.date_range(start='2020-01-01', end='2025-07-21', freq='B')  # Business days
-taiex = pd.Series(10000 + np.cumsum(np.random.normal(0, 50, len(dates))), index=dates)  # Synthetic TAIEX data
-usd_twd = pd.Series(30 + np.cumsum(np.random.normal(0, 0.1, len(dates))), index=dates)  # Synthetic USD/TWD data
+# Synthetic TAIEX (~8% vol from 10000) and USD/TWD (~5% vol from 30), fixed seeds for reproducibility
+taiex = spot_paths(['TAIEX'], dates, seed=42, start_range=(10000, 10000), vol_range=(0.08, 0.08))['TAIEX']
+usd_twd = spot_paths(['USD/TWD'], dates, seed=43, start_range=(30, 30), vol_range=(0.05, 0.05))['USD/TWD']
 
 # Step 2: Calculate correlation between TAIEX and USD/TWD
 correlation = taiex.corr(usd_twd)
@@ -52,7 +52,7 @@ strike_price = 10000  # Strike price (e.g., initial TAIEX level)
 fixed_fx_rate = 30  # Fixed FX rate for quanto forward (e.g., 30 TWD/USD)
 
 # Step 5: Simulate trades
-quanto_pay imported = simulate_quanto_forward(taiex, strike_price, fixed_fx_rate)
+quanto_payoff = simulate_quanto_forward(taiex, strike_price, fixed_fx_rate)
 unhedged_payoff = simulate_taiex_futures_unhedged(taiex, strike_price, usd_twd)
 
 # Step 6: Display results
@@ -6,23 +6,19 @@ import plotly.express as px
 import dash_mantine_components as dmc
 from dash_iconify import DashIconify
 
+from option_codes import OPTION_CODES
+from skew_engine import latest_skew
+from synthetic_data import load_test_universe, option_activity
+from vol_scoring import ForecastTable
+
 app = Dash(__name__)
 
 # Your sample options data (replace with your real data)
+sample_activity = option_activity(load_test_universe(["AAPL", "MSFT"]),
+                                  pd.date_range("2024-06-01", periods=30, freq="D"), seed=42)
 option_data = {
-    "AAPL": pd.DataFrame({
-        "Date": pd.date_range("2024-06-01", periods=30, freq="D"),
-        "Notional Traded": [1e8 + i*1e6 for i in range(30)],
-        "Put OI": [2e6 + ((-1)**i)*5e4 for i in range(30)],
-        "Call OI": [3e6 + ((-1)**(i+1))*6e4 for i in range(30)],
-    }),
-    "MSFT": pd.DataFrame({
-        "Date": pd.date_range("2024-06-01", periods=30, freq="D"),
-        "Notional Traded": [1e8 + i*1.2e6 for i in range(30)],
-        "Put OI": [1.5e6 + ((-1)**i)*4e4 for i in range(30)],
-        "Call OI": [2.5e6 + ((-1)**(i+1))*5e4 for i in range(30)],
-    }),
-    # add more tickers as needed
+    str(ticker): frame[["Date", "Notional Traded", "Put OI", "Call OI"]].reset_index(drop=True)
+    for ticker, frame in sample_activity.groupby("Ticker", observed=True)
 }
 
 # Table data (replace with your real data)
@@ -43,11 +39,28 @@ table_data = [
     },
 ]
 
+# Overwrite the placeholder skew with the cached 25-delta risk reversal where available
+skew_summary = latest_skew()
+if not skew_summary.empty:
+    for row in table_data:
+        code = OPTION_CODES.get(row["Ticker"], row["Ticker"])
+        if code in skew_summary.index and pd.notna(skew_summary.at[code, "skew"]):
+            row["Skew"] = round(float(skew_summary.at[code, "skew"]), 4)
+
+# Current and predicted next-day ATM vol, looked up in the cached forecast table
+forecasts = ForecastTable()
+for row in table_data:
+    forecast = forecasts.lookup(row["Ticker"])
+    row["ATM Vol"] = forecast["ATM_vol"] if forecast else None
+    row["Predicted ATM Vol"] = forecast["ATM_vol_forecast"] if forecast else None
+
 columnDefs = [
     {"headerName": "Ticker", "field": "Ticker"},
     {"headerName": "Price Action", "field": "Price Action"},
     {"headerName": "Change in Notional Traded", "field": "Change in Notional Traded", "type": "rightAligned", "valueFormatter": {"function": "d3.format('.2%')(params.value)"}},
     {"headerName": "Skew", "field": "Skew", "type": "rightAligned", "valueFormatter": {"function": "d3.format('.2%')(params.value)"}},
+    {"headerName": "ATM Vol", "field": "ATM Vol", "type": "rightAligned", "valueFormatter": {"function": "params.value == null ? '' : d3.format('.2%')(params.value)"}},
+    {"headerName": "Predicted ATM Vol", "field": "Predicted ATM Vol", "type": "rightAligned", "valueFormatter": {"function": "params.value == null ? '' : d3.format('.2%')(params.value)"}},
     {"headerName": "Comments", "field": "Comments"},
 ]
 
@@ -0,0 +1,184 @@
+import math
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import TimeSeriesSplit
+
+# Closed-form ridge regression for every SEHK code in one pass.
+#
+# ridge_regr1.py filters the frame once per code and fits an sklearn Ridge per code. Here
+# the frame is sorted and grouped once, each code's centred normal equations
+# (Xc'Xc, Xc'yc) are built with segment sums over all rows, and every code's system is
+# solved in a single batched np.linalg.solve call. Centring each row by its own code's
+# training means before the sums keeps the large OI and volume columns accurate, and gives
+# the same coefficients and intercept as sklearn's Ridge(fit_intercept=True).
+
+FEATURES = ['OInt', 'Volume', 'Call_OInt_Volume', 'Put_OInt_Volume', 'Volume_Total_OI']
+TARGET = 'ATM_vol_target'
+
+
+def prepare_ridge_data(df, features=FEATURES, code_col='SEHK_Code', date_col='date'):
+    """
+    Sort by (code, date) once, add the next-day ATM_vol target per code and drop incomplete rows.
+
+    df may also be a feature_store.FeatureStore, whose materialized rows are read as they are.
+
+    Returns:
+    pandas.DataFrame: Rows ordered by code then date, with a TARGET column
+    """
+    if hasattr(df, 'training_frame'):
+        return df.training_frame(features)
+    data = df.sort_values([code_col, date_col], kind='mergesort')
+    data = data.assign(**{TARGET: data.groupby(code_col, sort=False)['ATM_vol'].shift(-1)})
+    return data.dropna(subset=['ATM_vol'] + list(features) + [TARGET])
+
+
+def segment_sums(values, group, n_groups):
+    """Sum the rows of a (rows, k) array per group with one bincount per column."""
+    values = np.asarray(values, dtype=np.float64).reshape(len(group), -1)
+    return np.stack([np.bincount(group, weights=values[:, k], minlength=n_groups)
+                     for k in range(values.shape[1])], axis=1)
+
+
+def normal_equations(X, y, group, n_groups):
+    """
+    Per-group centred normal equations.
+
+    Returns:
+    tuple: (x_mean (G, p), y_mean (G,), xtx (G, p, p), xty (G, p), counts (G,))
+    """
+    counts = np.bincount(group, minlength=n_groups).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = segment_sums(X, group, n_groups) / counts[:, None]
+        y_mean = segment_sums(y, group, n_groups)[:, 0] / counts
+    Xc = X - x_mean[group]
+    yc = y - y_mean[group]
+
+    n_features = X.shape[1]
+    rows, cols = np.triu_indices(n_features)
+    upper = segment_sums(Xc[:, rows] * Xc[:, cols], group, n_groups)
+    xtx = np.zeros((n_groups, n_features, n_features))
+    xtx[:, rows, cols] = upper
+    xtx[:, cols, rows] = upper
+    xty = segment_sums(Xc * yc[:, None], group, n_groups)
+    return x_mean, y_mean, xtx, xty, counts
+
+
+def solve_ridge(xtx, xty, alpha):
+    """Solve (Xc'Xc + alpha I) w = Xc'yc for every group in one batched call."""
+    n_features = xtx.shape[-1]
+    return np.linalg.solve(xtx + alpha * np.eye(n_features), xty[..., None])[..., 0]
+
+
+def _as_sklearn(coef, intercept, alpha, feature_names):
+    """A fitted sklearn Ridge carrying the batched solution, so model.predict keeps working."""
+    model = Ridge(alpha=alpha)
+    model.coef_ = coef
+    model.intercept_ = intercept
+    model.n_features_in_ = len(feature_names)
+    model.feature_names_in_ = np.asarray(feature_names, dtype=object)
+    return model
+
+
+def fit_ridge_batch(df, alpha=1.0, test_size=0.2, features=FEATURES, code_col='SEHK_Code',
+                    date_col='date', verbose=True):
+    """
+    Batched equivalent of ridge_regr1.py.
+
+    Each code's rows are split in time order like train_test_split(shuffle=False,
+    test_size=test_size): the last ceil(test_size * n) rows are the test set. Codes with
+    too few rows for both sets are skipped.
+
+    Parameters:
+    df (pandas.DataFrame): Rows with code_col, date_col, 'ATM_vol' and the feature columns
+    alpha (float or array): Ridge penalty, or one penalty per code in sorted code order
+
+    Returns:
+    dict: code -> {'model', 'mse', 'coef', 'intercept', 'feature_names'} as in ridge_regr1.py
+    """
+    features = list(features)
+    data = prepare_ridge_data(df, features, code_col, date_col)
+    group, codes = pd.factorize(data[code_col], sort=True)
+    n_groups = len(codes)
+
+    # Position of each row within its code (rows are already sorted by code, date)
+    counts = np.bincount(group, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    position = np.arange(len(group)) - starts[group]
+    n_test = np.array([math.ceil(test_size * n) for n in counts], dtype=np.int64)
+    n_train = counts - n_test
+    train = position < n_train[group]
+
+    X = data[features].to_numpy(dtype=np.float64)
+    y = data[TARGET].to_numpy(dtype=np.float64)
+    x_mean, y_mean, xtx, xty, _ = normal_equations(X[train], y[train], group[train], n_groups)
+
+    valid = (n_train > 0) & (n_test > 0)
+    alphas = np.broadcast_to(np.asarray(alpha, dtype=np.float64), (n_groups,))
+    coef = np.full((n_groups, len(features)), np.nan)
+    coef[valid] = solve_ridge(xtx[valid], xty[valid], alphas[valid][:, None, None])
+    intercept = y_mean - np.einsum('gp,gp->g', x_mean, coef)
+
+    test = ~train
+    pred = np.einsum('np,np->n', X[test], coef[group[test]]) + intercept[group[test]]
+    sq_err = np.bincount(group[test], weights=(y[test] - pred) ** 2, minlength=n_groups)
+    mse = sq_err / np.maximum(n_test, 1)
+
+    results = {}
+    for g in np.flatnonzero(valid):
+        code = codes[g]
+        results[code] = {
+            'model': _as_sklearn(coef[g], intercept[g], alphas[g], features),
+            'mse': mse[g],
+            'coef': coef[g],
+            'intercept': intercept[g],
+            'feature_names': features,
+        }
+        if verbose:
+            print(f"SEHK Code: {code}, Test MSE: {mse[g]:.4f}")
+    return results
+
+
+# ------------------------
+# Alpha selection with time-series cross-validation
+# ------------------------
+
+def ridge_alpha_path(X_train, y_train, X_eval, alphas):
+    """
+    Predictions on X_eval for every alpha from one SVD of the centred training matrix.
+
+    With Xc = U S V', the ridge solution is w(alpha) = V diag(s / (s^2 + alpha)) U'yc, so
+    the whole alpha grid costs one decomposition plus a (p x alphas) product.
+
+    Returns:
+    numpy.ndarray: (len(X_eval), len(alphas)) predictions, intercepts included
+    """
+    x_mean = X_train.mean(axis=0)
+    y_mean = y_train.mean()
+    U, s, Vt = np.linalg.svd(X_train - x_mean, full_matrices=False)
+    uty = U.T @ (y_train - y_mean)
+    shrink = s[:, None] / (s[:, None] ** 2 + np.asarray(alphas, dtype=np.float64)[None, :])
+    coef = Vt.T @ (shrink * uty[:, None])  # (p, alphas)
+    return (X_eval - x_mean) @ coef + y_mean
+
+
+def ridge_cv(X, y, alphas, n_splits=5):
+    """
+    GridSearchCV(Ridge(), {'alpha': alphas}, cv=TimeSeriesSplit(n_splits),
+    scoring='neg_mean_squared_error') without refitting per alpha.
+
+    Returns:
+    tuple: (best_alpha, best CV MSE, mean CV MSE per alpha); ties go to the first alpha,
+           as in GridSearchCV
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    alphas = np.asarray(alphas, dtype=np.float64)
+    fold_mse = []
+    for train_idx, test_idx in TimeSeriesSplit(n_splits=n_splits).split(X):
+        pred = ridge_alpha_path(X[train_idx], y[train_idx], X[test_idx], alphas)
+        fold_mse.append(((pred - y[test_idx, None]) ** 2).mean(axis=0))
+    mse_path = np.mean(fold_mse, axis=0)
+    best = int(np.argmin(mse_path))
+    return alphas[best], mse_path[best], mse_path
@@ -1,16 +1,22 @@
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import Ridge
-from sklearn.model_selection import TimeSeriesSplit, GridSearchCV, train_test_split
 from sklearn.metrics import mean_squared_error
 import matplotlib.pyplot as plt
 
+from ridge_batch import ridge_cv
+
 # Cross validation grid search alpha
 # -------------- Configuration --------------
 # Your DataFrame: df (as described above)
 # If needed, ensure date is sorted and not duplicated
 df = df.sort_values(['SEHK_Code', 'date'])  # Replace with your sorting
 alphas = np.logspace(-3, 2, 10)  # Grid for Ridge regularization
+report_dir = None  # e.g. 'forecast_report': render all plots headless into a static report instead of showing them
+
+if report_dir:
+    from forecast_report import render_report  # Switches matplotlib to the Agg backend
+plots = {}
 
 results = {}
 
@@ -24,12 +30,10 @@ for code in df['SEHK_Code'].unique():
     y = sub['ATM_vol_target'].values
 
     # --- Time series split for CV ---
-    tscv = TimeSeriesSplit(n_splits=5)
-    ridge = Ridge()
-    grid = GridSearchCV(ridge, param_grid={'alpha': alphas}, cv=tscv, scoring='neg_mean_squared_error')
-    grid.fit(X, y)
-    best_alpha = grid.best_params_['alpha']
-    print(f"SEHK {code}: best alpha={best_alpha:.4f}, best CV MSE={-grid.best_score_:.4f}")
+    # Same folds, grid and scoring as GridSearchCV(Ridge(), cv=TimeSeriesSplit(5)), with every
+    # alpha evaluated from one SVD per fold instead of one refit per (alpha, fold)
+    best_alpha, best_cv_mse, _ = ridge_cv(X, y, alphas, n_splits=5)
+    print(f"SEHK {code}: best alpha={best_alpha:.4f}, best CV MSE={best_cv_mse:.4f}")
 
     # --- Out-of-sample test split (last 20% as test) ---
     n = len(y)
@@ -56,15 +60,23 @@ for code in df['SEHK_Code'].unique():
     }
 
     # --- Out-of-sample prediction plot ---
-    plt.figure(figsize=(7, 4))
-    plt.plot(sub['date'].iloc[n_train:], y_test, label='True')
-    plt.plot(sub['date'].iloc[n_train:], y_pred, label='Predicted', linestyle='--')
-    plt.title(f'ATM Volatility Prediction (SEHK {code})')
-    plt.xlabel('Date')
-    plt.ylabel('ATM Volatility (1-day ahead)')
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
+    plots[code] = {
+        'title': f'ATM Volatility Prediction (SEHK {code})',
+        'dates': sub['date'].iloc[n_train:].to_numpy(),
+        'y_true': y_test,
+        'y_pred': y_pred,
+        'metrics': {'Best alpha': best_alpha, 'CV MSE': best_cv_mse, 'Test MSE': mse},
+    }
+    if not report_dir:
+        plt.figure(figsize=(7, 4))
+        plt.plot(plots[code]['dates'], y_test, label='True')
+        plt.plot(plots[code]['dates'], y_pred, label='Predicted', linestyle='--')
+        plt.title(plots[code]['title'])
+        plt.xlabel('Date')
+        plt.ylabel('ATM Volatility (1-day ahead)')
+        plt.legend()
+        plt.tight_layout()
+        plt.show()
 
 # One model
 # --- Prepare one big DataFrame with all codes ---
@@ -86,12 +98,8 @@ X_train_all, X_test_all = X_all.iloc[:n_train], X_all.iloc[n_train:]
 y_train_all, y_test_all = y_all.iloc[:n_train], y_all.iloc[n_train:]
 
 # --- Grid search cross-validation for alpha (using TimeSeriesSplit) ---
-tscv = TimeSeriesSplit(n_splits=5)
-ridge = Ridge()
-grid = GridSearchCV(ridge, param_grid={'alpha': alphas}, cv=tscv, scoring='neg_mean_squared_error')
-grid.fit(X_train_all, y_train_all)
-best_alpha_all = grid.best_params_['alpha']
-print(f"\n[ALL TICKERS] Best alpha: {best_alpha_all:.4f}, best CV MSE: {-grid.best_score_:.4f}")
+best_alpha_all, best_cv_mse_all, _ = ridge_cv(X_train_all, y_train_all, alphas, n_splits=5)
+print(f"\n[ALL TICKERS] Best alpha: {best_alpha_all:.4f}, best CV MSE: {best_cv_mse_all:.4f}")
 
 # --- Final model on all training data ---
 ridge_all = Ridge(alpha=best_alpha_all)
@@ -101,12 +109,24 @@ mse_all = mean_squared_error(y_test_all, y_pred_all)
 print(f"[ALL TICKERS] Test MSE: {mse_all:.4f}")
 
 # --- Plot out-of-sample predictions (all tickers) ---
-plt.figure(figsize=(10, 4))
-plt.plot(df2['date'].iloc[n_train:], y_test_all, label='True')
-plt.plot(df2['date'].iloc[n_train:], y_pred_all, label='Predicted', linestyle='--')
-plt.title('ATM Volatility Prediction (All Tickers, Out-of-sample)')
-plt.xlabel('Date')
-plt.ylabel('ATM Volatility (1-day ahead)')
-plt.legend()
-plt.tight_layout()
-plt.show()
+if report_dir:
+    # Pooled plot first on the index page, then the codes in the order they were fitted
+    pooled = {'ALL': {
+        'title': 'ATM Volatility Prediction (All Tickers, Out-of-sample)',
+        'dates': df2['date'].iloc[n_train:].to_numpy(),
+        'y_true': y_test_all.to_numpy(),
+        'y_pred': y_pred_all,
+        'figsize': (10, 4),
+        'metrics': {'Best alpha': best_alpha_all, 'CV MSE': best_cv_mse_all, 'Test MSE': mse_all},
+    }}
+    render_report({**pooled, **plots}, report_dir)
+else:
+    plt.figure(figsize=(10, 4))
+    plt.plot(df2['date'].iloc[n_train:], y_test_all, label='True')
+    plt.plot(df2['date'].iloc[n_train:], y_pred_all, label='Predicted', linestyle='--')
+    plt.title('ATM Volatility Prediction (All Tickers, Out-of-sample)')
+    plt.xlabel('Date')
+    plt.ylabel('ATM Volatility (1-day ahead)')
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
@@ -1,50 +1,15 @@
-import requests
-import datetime
-import os
+from short_sell_fetcher import DEFAULT_SAVE_FOLDER, scrape
 
-# HKEX short selling data URL
-url = "https://www.hkex.com.hk/eng/stat/smstat/ssturnover/ncms/mshtmain.htm"
+# HKEX short selling data: morning and closing pages, fetched concurrently with conditional
+# GETs and retries (see short_sell_fetcher.py). Unchanged pages are not saved again, so
+# scheduling this more often than the pages update is cheap.
+save_folder = DEFAULT_SAVE_FOLDER
+past_dates = []  # e.g. ['2025-08-15'] to back-fill day-close pages
 
-# Create a folder to save data
-save_folder = "hkex_short_selling"
-os.makedirs(save_folder, exist_ok=True)
-
-# Current date and time for filename
-now = datetime.datetime.now()
-timestamp = now.strftime("%Y%m%d_%H%M")
-
-# File path
-file_path = os.path.join(save_folder, f"short_selling_{timestamp}.html")
-
-# Download and save the data
-try:
-    response = requests.get(url)
-    response.raise_for_status()
-    with open(file_path, 'w', encoding="utf-8") as f:
-        f.write(response.text)
-    print(f"Downloaded and saved: {file_path}")
-except Exception as e:
-    print(f"Failed to download: {e}")
-
-# BS4
-
-from bs4 import BeautifulSoup
-
-# ... [previous code up to response.text]
-
-soup = BeautifulSoup(response.text, 'html.parser')
-# Find the main table (adjust selector as needed)
-table = soup.find("table")
-if table:
-    table_html = str(table)
-    with open(file_path.replace('.html', '_table.html'), 'w', encoding='utf-8') as f:
-        f.write(table_html)
-    print(f"Table saved: {file_path.replace('.html', '_table.html')}")
-else:
-    print("Table not found in HTML.")
+scrape(past_dates, save_folder=save_folder)
 
 # Schedule on windows 
-'''
+r'''
 Note the full path, e.g., C:\Users\YourUser\Anaconda3\python.exe or C:\Python39\python.exe.
 3. Open Windows Task Scheduler
 Press Win + S and type Task Scheduler, then open it.
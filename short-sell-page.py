@@ -5,37 +5,34 @@ import plotly.graph_objs as go
 import pandas as pd
 import numpy as np
 
+from synthetic_data import load_test_universe, short_selling
+
 # Example data (replace with your real data)
-np.random.seed(42)
 dates = pd.date_range('2024-08-01', periods=20)
-stocks = ['BYD (1211 HK)', 'Tencent (700 HK)', 'Meituan (3690 HK)']
-data = []
-for date in dates:
-    for stock in stocks:
-        sst = np.random.normal(0, 1)
-        put_change = np.random.normal(0, 1)
-        call_change = np.random.normal(0, 1)
-        price = np.random.normal(0, 1)
-        # Event flagging logic
-        if sst > 0.8 and put_change > 0.5 and price < -0.5:
-            event_type = 'Type 1'
-        elif sst > 0.8 and put_change > 0.5 and price > 0.5:
-            event_type = 'Type 2'
-        elif sst > 0.8 and call_change < -0.5 and price > 0.5:
-            event_type = 'Type 3'
-        else:
-            event_type = None
-        if event_type:
-            data.append({
-                'Date': date.strftime('%Y-%m-%d'),
-                'Stock': stock,
-                'Short Selling Turnover Δ (%)': round(sst*30 + 30, 1),
-                'Put OI Δ (%)': round(put_change*20 + 10, 1),
-                'Call OI Δ (%)': round(call_change*15, 1),
-                'Price Δ (%)': round(price*2, 2),
-                'Event Type': event_type
-            })
-df = pd.DataFrame(data)
+stocks = load_test_universe(['BYD (1211 HK)', 'Tencent (700 HK)', 'Meituan (3690 HK)'])
+flow = short_selling(stocks, dates, seed=42)
+flow = pd.DataFrame({
+    'Date': flow['Date'].dt.strftime('%Y-%m-%d'),
+    'Stock': flow['Ticker'].astype(str),
+    'Short Selling Turnover Δ (%)': (flow['Short Turnover z'] * 30 + 30).round(1),
+    'Put OI Δ (%)': (flow['Put OI z'] * 20 + 10).round(1),
+    'Call OI Δ (%)': (flow['Call OI z'] * 15).round(1),
+    'Price Δ (%)': (flow['Price z'] * 2).round(2),
+    'sst': flow['Short Turnover z'], 'put_change': flow['Put OI z'],
+    'call_change': flow['Call OI z'], 'price': flow['Price z'],
+})
+# Event flagging logic
+flow['Event Type'] = np.select(
+    [
+        (flow['sst'] > 0.8) & (flow['put_change'] > 0.5) & (flow['price'] < -0.5),
+        (flow['sst'] > 0.8) & (flow['put_change'] > 0.5) & (flow['price'] > 0.5),
+        (flow['sst'] > 0.8) & (flow['call_change'] < -0.5) & (flow['price'] > 0.5),
+    ],
+    ['Type 1', 'Type 2', 'Type 3'],
+    default='',
+)
+flow = flow.drop(columns=['sst', 'put_change', 'call_change', 'price'])
+df = flow[flow['Event Type'] != ''].reset_index(drop=True)
 
 app = dash.Dash(__name__)
 
@@ -82,12 +79,13 @@ def show_details(selected_rows, table_data):
     if not selected_rows:
         return ""
     row = table_data[selected_rows[0]]
-    # Fake time series for charts
-    days = pd.date_range(pd.to_datetime(row['Date']) - pd.Timedelta(days=2), periods=3)
-    sst_series = np.random.normal(loc=row['Short Selling Turnover Δ (%)']-10, scale=3, size=3)
-    put_series = np.random.normal(loc=row['Put OI Δ (%)']-2, scale=2, size=3)
-    call_series = np.random.normal(loc=row['Call OI Δ (%)']+2, scale=2, size=3)
-    price_series = np.cumsum(np.random.normal(loc=row['Price Δ (%)']/3, scale=0.5, size=3)) + 100
+    # The three days up to the event from the same data
+    context = flow[(flow['Stock'] == row['Stock']) & (flow['Date'] <= row['Date'])].tail(3)
+    days = pd.to_datetime(context['Date'])
+    sst_series = context['Short Selling Turnover Δ (%)']
+    put_series = context['Put OI Δ (%)']
+    call_series = context['Call OI Δ (%)']
+    price_series = 100 * (1 + context['Price Δ (%)'] / 100).cumprod()
 
     fig = go.Figure()
     fig.add_trace(go.Bar(x=days, y=sst_series, name='Short Selling Turnover Δ (%)', marker_color='#888'))
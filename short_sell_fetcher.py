@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import random
+from email.utils import formatdate
+
+import aiohttp
+from aiohttp import web
+from bs4 import BeautifulSoup
+
+# Concurrent fetcher for the HKEX short-selling turnover pages.
+#
+# All pages go through one pooled aiohttp session; a semaphore bounds the requests in
+# flight. Every response's ETag and Last-Modified are kept in <save_folder>/_validators.json
+# and sent back as If-None-Match / If-Modified-Since, so an unchanged page costs a 304 and
+# is not written again. Connection errors, timeouts, 429 and 5xx responses are retried with
+# exponential backoff and jitter. serve_recorded() stands in for hkex.com.hk with a folder
+# of saved pages, so the fetcher can be run against a local server.
+
+BASE_URL = "https://www.hkex.com.hk/eng/stat/smstat/ssturnover/ncms"
+PAGES = {
+    'morning': 'mshtmain.htm',  # Main board short selling turnover at the morning close
+    'closing': 'ashtmain.htm',  # ... and at the day close
+}
+HISTORY_PAGE = 'ashtmain_{date:%Y%m%d}.htm'  # Day-close page of a past date
+DEFAULT_SAVE_FOLDER = 'hkex_short_selling'
+VALIDATORS_FILE = '_validators.json'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def page_urls(dates=(), base_url=BASE_URL, sessions=PAGES):
+    """{name: url} for the current session pages and the day-close page of every date."""
+    base_url = base_url.rstrip('/')
+    urls = {name: f"{base_url}/{page}" for name, page in sessions.items()}
+    for date in dates:
+        date = datetime.date.fromisoformat(str(date)) if not isinstance(date, datetime.date) else date
+        urls[f"{date:%Y%m%d}"] = f"{base_url}/{HISTORY_PAGE.format(date=date)}"
+    return urls
+
+
+def load_validators(save_folder=DEFAULT_SAVE_FOLDER):
+    """{url: {'etag', 'last_modified'}} from the previous runs."""
+    path = os.path.join(save_folder, VALIDATORS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_validators(validators, save_folder=DEFAULT_SAVE_FOLDER):
+    path = os.path.join(save_folder, VALIDATORS_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(validators, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+async def fetch_page(session, url, semaphore, validator=None, retries=3, backoff=1.0):
+    """
+    Conditional GET of one page with retries.
+
+    Parameters:
+    validator (dict): 'etag' / 'last_modified' of the copy already saved, if any
+    retries (int): Attempts after the first one for retryable failures
+    backoff (float): Seconds before the first retry; doubled per attempt, plus jitter
+
+    Returns:
+    tuple: (status, text or None, validator dict); text is None for 304 Not Modified
+    """
+    headers = {}
+    if validator:
+        if validator.get('etag'):
+            headers['If-None-Match'] = validator['etag']
+        if validator.get('last_modified'):
+            headers['If-Modified-Since'] = validator['last_modified']
+
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        return 304, None, validator
+                    if response.status not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        text = await response.text()
+                        return response.status, text, {
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified'),
+                        }
+                    retry_after = response.headers.get('Retry-After')
+                    error = f"HTTP {response.status}"
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+            retry_after = None
+            error = str(e) or type(e).__name__
+        if attempt == retries:
+            raise RuntimeError(f"{url}: {error} after {retries + 1} attempts")
+        delay = backoff * 2 ** attempt * (1 + random.random())
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        await asyncio.sleep(delay)
+
+
+def save_page(name, text, save_folder=DEFAULT_SAVE_FOLDER, timestamp=None):
+    """Write a page and its first table as short_selling_<name>_<timestamp>[_table].html."""
+    timestamp = timestamp or datetime.datetime.now().strftime("%Y%m%d_%H%M")
+    file_path = os.path.join(save_folder, f"short_selling_{name}_{timestamp}.html")
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    table = BeautifulSoup(text, 'html.parser').find("table")
+    if table:
+        with open(file_path.replace('.html', '_table.html'), 'w', encoding='utf-8') as f:
+            f.write(str(table))
+    else:
+        print(f"{name}: table not found in HTML.")
+    return file_path
+
+
+async def fetch_all(urls, save_folder=DEFAULT_SAVE_FOLDER, max_concurrency=4, retries=3, backoff=1.0,
+                    timeout=30.0):
+    """
+    Fetch {name: url} concurrently over one session and save the pages that changed.
+
+    Returns:
+    dict: name -> saved file path, None if not modified, or the exception if it failed
+    """
+    os.makedirs(save_folder, exist_ok=True)
+    validators = load_validators(save_folder)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        names = list(urls)
+        outcomes = await asyncio.gather(
+            *(fetch_page(session, urls[name], semaphore, validators.get(urls[name]), retries, backoff)
+              for name in names),
+            return_exceptions=True)
+
+    results = {}
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Failed to download {name}: {outcome}")
+            results[name] = outcome
+            continue
+        status, text, validator = outcome
+        if text is None:
+            print(f"{name}: not modified")
+            results[name] = None
+            continue
+        results[name] = save_page(name, text, save_folder, timestamp)
+        validators[urls[name]] = validator
+        print(f"Downloaded and saved: {results[name]}")
+    save_validators(validators, save_folder)
+    return results
+
+
+def scrape(dates=(), base_url=BASE_URL, save_folder=DEFAULT_SAVE_FOLDER, **kwargs):
+    """Blocking entry point: fetch the morning and closing pages and any past dates."""
+    return asyncio.run(fetch_all(page_urls(dates, base_url), save_folder, **kwargs))
+
+
+def serve_recorded(folder):
+    """
+    aiohttp app serving the saved pages in folder by file name, with ETag / Last-Modified
+    and 304 responses like the real site, e.g. to point scrape(base_url=...) at.
+    """
+    async def handle(request):
+        path = os.path.join(folder, os.path.basename(request.match_info['name']))
+        if not os.path.isfile(path):
+            raise web.HTTPNotFound()
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        mtime = int(os.path.getmtime(path))
+        headers = {'ETag': etag, 'Last-Modified': formatdate(mtime, usegmt=True)}
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers=headers)
+        since = request.if_modified_since
+        if 'If-None-Match' not in request.headers and since is not None and mtime <= since.timestamp():
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type='text/html', charset='utf-8', headers=headers)
+
+    app = web.Application()
+    app.router.add_get('/{name:.*}', handle)
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Download the HKEX short selling turnover pages.")
+    parser.add_argument('--date', action='append', default=[], help="Also fetch this past date (YYYY-MM-DD); repeatable")
+    parser.add_argument('--base-url', default=BASE_URL, help="Site to fetch from, e.g. a local serve_recorded server")
+    parser.add_argument('--save-folder', default=DEFAULT_SAVE_FOLDER, help="Folder the pages are saved to")
+    parser.add_argument('--concurrency', type=int, default=4, help="Requests in flight at once")
+    parser.add_argument('--retries', type=int, default=3, help="Retries per page after the first attempt")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Seconds per request")
+    parser.add_argument('--serve', default=None, metavar='FOLDER',
+                        help="Instead of fetching, serve the recorded pages in FOLDER locally")
+    parser.add_argument('--port', type=int, default=8000, help="Port for --serve")
+    args = parser.parse_args()
+
+    if args.serve:
+        web.run_app(serve_recorded(args.serve), port=args.port)
+    else:
+        scrape(args.date, args.base_url, args.save_folder, max_concurrency=args.concurrency,
+               retries=args.retries, timeout=args.timeout)
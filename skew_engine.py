@@ -0,0 +1,187 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from option_codes import OPTION_CODES
+
+# Batch skew and term-structure engine over implied vols from iv_engine.chain_implied_vols.
+#
+# For every (date, underlying, expiry) the call and put smiles are interpolated in delta in
+# one vectorized pass: rows are sorted by group and delta, each group's delta is shifted by
+# its group number so the whole universe forms one increasing key, and a single
+# np.searchsorted finds the bracketing options of every group at once.
+
+DEFAULT_CACHE_DIR = 'skew_cache'
+TARGET_DAYS = 30  # Summary skew is read from the expiry closest to one month
+
+
+def forward_delta(forward, strike, t, iv, is_call):
+    """Black-76 forward delta: N(d1) for calls, N(d1) - 1 for puts."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(forward / strike) + 0.5 * iv * iv * t) / (iv * np.sqrt(t))
+    return np.where(is_call, ndtr(d1), ndtr(d1) - 1.0)
+
+
+def _interp_at(group, x, y, n_groups, target):
+    """
+    Linear interpolation of y at x == target within every group; x must lie in [0, 1).
+
+    Returns NaN for groups whose options do not bracket the target.
+    """
+    order = np.lexsort((x, group))
+    g, key, v = group[order], group[order] + x[order], y[order]
+    targets = np.arange(n_groups) + target
+
+    hi = np.searchsorted(key, targets)
+    lo = hi - 1
+    ok = (lo >= 0) & (hi < len(key))
+    lo_c, hi_c = np.clip(lo, 0, len(key) - 1), np.clip(hi, 0, len(key) - 1)
+    groups = np.arange(n_groups)
+    ok &= (g[lo_c] == groups) & (g[hi_c] == groups)
+
+    span = key[hi_c] - key[lo_c]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(span > 0, (targets - key[lo_c]) / span, 1.0)
+    return np.where(ok, v[lo_c] + weight * (v[hi_c] - v[lo_c]), np.nan)
+
+
+def compute_skew(ivs):
+    """
+    25-delta risk reversal, wing skews and ATM vol for every (date, underlying, expiry).
+
+    Parameters:
+    ivs (pandas.DataFrame): Output of iv_engine.chain_implied_vols
+
+    Returns:
+    pandas.DataFrame: date, underlying, expiry, t, atm_iv (50-delta call), call_25d, put_25d,
+                      rr_25d (call_25d - put_25d), call_wing and put_wing (25-delta vol minus ATM)
+    """
+    rows = ivs[ivs['iv'].notna() & (ivs['t'] > 0)]
+    is_call = (rows['right'] == 'C').to_numpy()
+    delta = forward_delta(rows['forward'].to_numpy(), rows['strike'].to_numpy(dtype=np.float64),
+                          rows['t'].to_numpy(), rows['iv'].to_numpy(), is_call)
+
+    keys = rows[['date', 'underlying', 'expiry']].astype({'underlying': str})
+    grouped = keys.groupby(['date', 'underlying', 'expiry'], sort=True)
+    group = grouped.ngroup().to_numpy()
+    result = grouped.size().index.to_frame(index=False)
+    n_groups = len(result)
+    iv = rows['iv'].to_numpy()
+
+    calls, puts = is_call, ~is_call
+    atm_iv = _interp_at(group[calls], delta[calls], iv[calls], n_groups, 0.5)
+    call_25d = _interp_at(group[calls], delta[calls], iv[calls], n_groups, 0.25)
+    # Put deltas live in (-1, 0); shift them into [0, 1) so -0.25 becomes 0.75
+    put_25d = _interp_at(group[puts], delta[puts] + 1.0, iv[puts], n_groups, 0.75)
+
+    result['t'] = rows['t'].groupby(group).first().reindex(range(n_groups)).to_numpy()
+    result['atm_iv'] = atm_iv
+    result['call_25d'] = call_25d
+    result['put_25d'] = put_25d
+    result['rr_25d'] = call_25d - put_25d
+    result['call_wing'] = call_25d - atm_iv
+    result['put_wing'] = put_25d - atm_iv
+    return result
+
+
+def summarize_skew(skew):
+    """
+    One row per (date, underlying) for the summary screens.
+
+    'skew' is the 25-delta risk reversal of the expiry closest to TARGET_DAYS; 'atm_front'
+    and 'atm_next' are the ATM vols of the two nearest expiries and 'term_spread' their
+    difference.
+    """
+    have_rr = skew[skew['rr_25d'].notna()].copy()
+    have_rr['distance'] = (have_rr['t'] * 365 - TARGET_DAYS).abs()
+    nearest = have_rr.loc[have_rr.groupby(['date', 'underlying'])['distance'].idxmin()]
+    summary = nearest.set_index(['date', 'underlying'])[['expiry', 'rr_25d', 'put_wing', 'call_wing']]
+    summary = summary.rename(columns={'rr_25d': 'skew'})
+
+    have_atm = skew[skew['atm_iv'].notna()].sort_values(['date', 'underlying', 't'])
+    fronts = have_atm.groupby(['date', 'underlying']).head(2)
+    ranked = fronts.assign(rank=fronts.groupby(['date', 'underlying']).cumcount())
+    term = ranked.pivot_table(index=['date', 'underlying'], columns='rank', values='atm_iv')
+    term = term.reindex(columns=[0, 1])
+    term.columns = ['atm_front', 'atm_next']
+    term['term_spread'] = term['atm_next'] - term['atm_front']
+    return summary.join(term, how='outer').reset_index()
+
+
+def _cache_file(cache_dir, date):
+    return os.path.join(cache_dir, f"skew_{pd.Timestamp(date):%Y%m%d}.pkl")
+
+
+def cached_dates(cache_dir=DEFAULT_CACHE_DIR):
+    """Sorted dates (pandas.Timestamp) that have a skew table in the cache."""
+    if not os.path.isdir(cache_dir):
+        return []
+    return [pd.Timestamp(name[5:13]) for name in sorted(os.listdir(cache_dir))
+            if name.startswith('skew_') and name.endswith('.pkl')]
+
+
+def update_skew_cache(ivs, cache_dir=DEFAULT_CACHE_DIR, overwrite=False):
+    """
+    Compute and cache the per-expiry skew table of every date in ivs that is not cached yet.
+
+    Dates already on disk are skipped unless overwrite is set, so feeding in a new day's
+    chains only costs that day. Returns the list of dates written.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    dates = pd.to_datetime(ivs['date']).dt.normalize()
+    pending = [d for d in dates.unique()
+               if overwrite or not os.path.exists(_cache_file(cache_dir, d))]
+    if not pending:
+        return []
+
+    skew = compute_skew(ivs[dates.isin(pending)])
+    for date, day in skew.groupby('date'):
+        path = _cache_file(cache_dir, date)
+        day.reset_index(drop=True).to_pickle(path + '.tmp')
+        os.replace(path + '.tmp', path)
+    print(f"Cached skew for {len(pending)} date(s) in {cache_dir}")
+    return sorted(pd.Timestamp(d) for d in pending)
+
+
+def load_skew(cache_dir=DEFAULT_CACHE_DIR, start=None, end=None):
+    """Per-expiry skew table for the cached dates in [start, end]; empty if nothing is cached."""
+    if not os.path.isdir(cache_dir):
+        return pd.DataFrame()
+    frames = []
+    for name in sorted(os.listdir(cache_dir)):
+        if not (name.startswith('skew_') and name.endswith('.pkl')):
+            continue
+        date = pd.Timestamp(name[5:13])
+        if (start is not None and date < pd.Timestamp(start)) or (end is not None and date > pd.Timestamp(end)):
+            continue
+        frames.append(pd.read_pickle(os.path.join(cache_dir, name)))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def latest_skew(cache_dir=DEFAULT_CACHE_DIR):
+    """Summary skew of the most recent cached date, indexed by underlying option code."""
+    if not os.path.isdir(cache_dir):
+        return pd.DataFrame()
+    names = sorted(n for n in os.listdir(cache_dir) if n.startswith('skew_') and n.endswith('.pkl'))
+    if not names:
+        return pd.DataFrame()
+    day = pd.read_pickle(os.path.join(cache_dir, names[-1]))
+    return summarize_skew(day).set_index('underlying')
+
+
+def with_real_skew(tickers_data, code_column='SEHK Code', cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Replace the 'Skew' column of a summary table with the latest cached 25-delta risk
+    reversal (as a vol fraction), keeping the existing value where no skew is cached.
+    """
+    summary = latest_skew(cache_dir)
+    if summary.empty:
+        return tickers_data
+    codes = tickers_data[code_column].astype(str)
+    codes = codes.map(OPTION_CODES).fillna(codes)
+    skew = codes.map(summary['skew']).round(4)
+    tickers_data = tickers_data.copy()
+    tickers_data['Skew'] = skew.fillna(tickers_data['Skew'])
+    return tickers_data
@@ -0,0 +1,202 @@
+import argparse
+import glob
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+import greeks_engine
+import skew_engine
+from dqe_loader import hash_file
+from iv_engine import chain_implied_vols
+from som_chain_store import chains_to_long
+from som_parser import PARSER_VERSION, SOM_FIELDS, parse_som_report
+
+# Batch parsing of historical SOM report archives.
+#
+# Each report's parsed frame is cached on disk under the SHA-256 of its contents and the
+# parser version, so a re-run only parses reports that are new or changed. A small index
+# of (size, mtime, hash) per path means unchanged files are not even re-read to be hashed.
+# update_chain_caches() then feeds the dates missing from the skew and greeks caches through
+# one implied-vol solve into both; running this module does the two steps in one go.
+
+DEFAULT_CACHE_DIR = 'som_cache'
+INDEX_FILE = '_index.json'
+
+# Report dates come from the file name: YYYYMMDD is tried before YYMMDD
+_DATE_PATTERNS = [(re.compile(r'(?<!\d)(\d{8})(?!\d)'), '%Y%m%d'), (re.compile(r'(?<!\d)(\d{6})(?!\d)'), '%y%m%d')]
+
+
+def report_date(file_path):
+    """Return the datetime.date encoded in a report's file name, or None if there is none."""
+    name = os.path.basename(file_path)
+    for pattern, fmt in _DATE_PATTERNS:
+        for match in pattern.finditer(name):
+            try:
+                return datetime.strptime(match.group(1), fmt).date()
+            except ValueError:
+                continue
+    return None
+
+
+def _resolve_reports(reports):
+    """Expand a directory, a glob pattern or a list of paths into sorted file paths."""
+    if isinstance(reports, str):
+        if os.path.isdir(reports):
+            paths = [os.path.join(reports, name) for name in os.listdir(reports)]
+        else:
+            paths = glob.glob(reports)
+    else:
+        paths = list(reports)
+    return sorted(os.path.abspath(p) for p in paths if os.path.isfile(p))
+
+
+def _parse_to_cache(file_path, cache_path):
+    """
+    Worker: parse one report and write the result to its cache file.
+
+    Returns:
+    tuple: (file_path, message or None)
+    """
+    try:
+        df = parse_som_report(file_path)
+        tmp_path = cache_path + '.tmp'
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+        return file_path, None
+    except Exception as e:
+        return file_path, f"Error processing file {os.path.basename(file_path)}: {str(e)}"
+
+
+def parse_som_reports(reports, cache_dir=DEFAULT_CACHE_DIR, max_workers=None, output_path=None):
+    """
+    Parse a batch of SOM reports across a process pool into one date-stamped dataset.
+
+    Parameters:
+    reports (str or list): Directory, glob pattern (e.g. 'archive/*.txt') or list of report paths
+    cache_dir (str): Directory of per-report parsed results keyed by content hash and parser version
+    max_workers (int): Worker processes for the reports that need parsing; None uses every CPU
+    output_path (str): If given, the combined dataset is also saved there as a pickle
+
+    Returns:
+    pandas.DataFrame: 'date' followed by the parse_som_report columns, sorted by date
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, INDEX_FILE)
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+
+    # --- 1. Work out each report's date and content hash ---
+    dated = []
+    new_index = {}
+    for file_path in _resolve_reports(reports):
+        date = report_date(file_path)
+        if date is None:
+            print(f"Warning: No date in file name {os.path.basename(file_path)}, skipped")
+            continue
+        stat = os.stat(file_path)
+        entry = index.get(file_path)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            sha256 = entry['sha256']
+        else:
+            sha256 = hash_file(file_path)
+        new_index[file_path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha256}
+        # Keyed by the parser version too, so a parser change does not serve stale parses
+        dated.append((date, file_path, os.path.join(cache_dir, f"{sha256}_v{PARSER_VERSION}.pkl")))
+
+    # --- 2. Parse only the reports whose content is not cached yet ---
+    missing = {}
+    for _, file_path, cache_path in dated:
+        if not os.path.exists(cache_path):
+            missing.setdefault(cache_path, file_path)  # Identical copies are parsed once
+    if missing:
+        workers = min(max_workers or os.cpu_count() or 1, len(missing))
+        if workers <= 1:
+            results = [_parse_to_cache(path, cache) for cache, path in missing.items()]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_parse_to_cache, missing.values(), missing.keys()))
+        for _, message in results:
+            if message:
+                print(message)
+
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(new_index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, index_path)
+
+    # --- 3. Stitch the cached frames into one dataset ---
+    frames = []
+    for date, _, cache_path in sorted(dated):
+        if not os.path.exists(cache_path):
+            continue  # Failed to parse, already reported
+        df = pd.read_pickle(cache_path)
+        df.insert(0, 'date', date)
+        frames.append(df)
+
+    if frames:
+        result_df = pd.concat(frames, ignore_index=True)
+    else:
+        result_df = pd.DataFrame(columns=['date', 'underlying', 'expiry'] + SOM_FIELDS)
+
+    if output_path is not None:
+        result_df.to_pickle(output_path)
+    return result_df
+
+
+def update_chain_caches(parsed, skew_cache_dir=skew_engine.DEFAULT_CACHE_DIR,
+                        greeks_cache_dir=greeks_engine.DEFAULT_CACHE_DIR, rate=0.0, dividend_yield=0.0,
+                        contract_sizes=None, overwrite=False):
+    """
+    Feed newly parsed chains into the skew and exposure caches the dashboards read.
+
+    Implied vols are solved once, and only for the dates missing from either cache, so
+    re-running over a whole archive after a new report lands only costs the new day.
+
+    Parameters:
+    parsed (pandas.DataFrame): parse_som_reports output
+    skew_cache_dir (str): Cache written by skew_engine.update_skew_cache
+    greeks_cache_dir (str): Cache written by greeks_engine.update_exposure_cache
+    rate, dividend_yield, contract_sizes: As for greeks_engine.update_exposure_cache
+    overwrite (bool): Recompute dates that are already cached
+
+    Returns:
+    dict: {'skew': dates written, 'exposure': dates written}
+    """
+    dates = pd.to_datetime(parsed['date']).dt.normalize()
+    if not overwrite:
+        cached = set(skew_engine.cached_dates(skew_cache_dir)) & set(greeks_engine.cached_dates(greeks_cache_dir))
+        parsed = parsed[(~dates.isin(cached)).to_numpy()]
+    if parsed.empty:
+        return {'skew': [], 'exposure': []}
+
+    ivs = chain_implied_vols(chains_to_long(parsed), rate=rate)
+    return {
+        'skew': skew_engine.update_skew_cache(ivs, skew_cache_dir, overwrite=overwrite),
+        'exposure': greeks_engine.update_exposure_cache(ivs, greeks_cache_dir, rate, dividend_yield,
+                                                        contract_sizes, overwrite=overwrite),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Parse SOM reports and update the skew and greeks caches with the new dates.")
+    parser.add_argument('reports', help="Directory, glob pattern or single report to ingest")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Parsed-report cache directory")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--output', default=None, help="Also save the combined parsed dataset to this pickle")
+    parser.add_argument('--skew-cache', default=skew_engine.DEFAULT_CACHE_DIR, help="Skew cache directory")
+    parser.add_argument('--greeks-cache', default=greeks_engine.DEFAULT_CACHE_DIR, help="Exposure cache directory")
+    parser.add_argument('--rate', type=float, default=0.0, help="Continuously compounded interest rate")
+    parser.add_argument('--dividend-yield', type=float, default=0.0, help="Continuous dividend yield for the greeks")
+    parser.add_argument('--overwrite', action='store_true', help="Recompute dates already in the caches")
+    args = parser.parse_args()
+
+    parsed = parse_som_reports(args.reports, args.cache_dir, max_workers=args.workers, output_path=args.output)
+    update_chain_caches(parsed, args.skew_cache, args.greeks_cache, rate=args.rate,
+                        dividend_yield=args.dividend_yield, overwrite=args.overwrite)
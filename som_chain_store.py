@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+
+# Indexed option-chain store built from parsed SOM reports.
+#
+# Rows are long (one per date, underlying, expiry, strike and call/put) with typed columns
+# and sorted by (underlying, date, expiry, right, strike). Each row also gets one int64 key
+# packing the first four of those, so a chain, all expiries of an underlying on a date, or
+# a strike range is found with np.searchsorted in O(log n) instead of a scan over string
+# labels like "CSE Call 30 30 JUL 25".
+
+CHAIN_COLUMNS = ['gross', 'net', 'net_change', 'turnover', 'deals', 'settle', 'price_change']
+RIGHTS = ['C', 'P']
+
+_DAY_BITS = 20  # Days since 1970 fit comfortably until the year 4840
+
+
+def _days(values):
+    """datetime-like values -> int64 days since 1970-01-01."""
+    return pd.to_datetime(pd.Series(values)).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _chain_key(underlying_code, date_days, expiry_days, right_code):
+    """Pack (underlying, date, expiry, right) into one sortable int64."""
+    key = np.asarray(underlying_code, dtype=np.int64)
+    key = (key << _DAY_BITS) | np.asarray(date_days, dtype=np.int64)
+    key = (key << _DAY_BITS) | np.asarray(expiry_days, dtype=np.int64)
+    return (key << 1) | np.asarray(right_code, dtype=np.int64)
+
+
+def chains_to_long(df, date=None):
+    """
+    Reshape parse_som_report / parse_som_reports output into typed long rows.
+
+    Parameters:
+    df (pandas.DataFrame): One row per strike with call_* and put_* columns
+    date: Report date for frames without a 'date' column
+
+    Returns:
+    pandas.DataFrame: date, underlying, expiry, strike, right and CHAIN_COLUMNS
+    """
+    dates = df['date'] if 'date' in df.columns else pd.Series(date, index=df.index)
+    # Only a handful of distinct expiry labels per report, parse each once
+    expiry_labels = df['expiry'].astype(str)
+    expiry_map = {label: pd.to_datetime(label, format='%d %b %y') for label in expiry_labels.unique()}
+
+    base = pd.DataFrame({
+        'date': pd.to_datetime(dates).dt.normalize(),
+        'underlying': df['underlying'].astype(str),
+        'expiry': expiry_labels.map(expiry_map),
+        'strike': df['strike'].astype(np.float64),
+    })
+    sides = []
+    for right, prefix in zip(RIGHTS, ['call_', 'put_']):
+        side = base.copy()
+        side['right'] = right
+        for column in CHAIN_COLUMNS:
+            side[column] = df[prefix + column].to_numpy()
+        sides.append(side)
+    return pd.concat(sides, ignore_index=True)
+
+
+class OptionChainStore:
+    """
+    Sorted, indexed option chains with O(log n) lookups by underlying, date, expiry and strike.
+
+    The underlying frame is available as .frame; lookups return slices of it.
+    """
+
+    def __init__(self, long_df):
+        frame = long_df.copy()
+        frame['underlying'] = frame['underlying'].astype('category')
+        frame['right'] = pd.Categorical(frame['right'], categories=RIGHTS)
+
+        underlying_code = frame['underlying'].cat.codes.to_numpy()
+        date_days = _days(frame['date'])
+        expiry_days = _days(frame['expiry'])
+        right_code = frame['right'].cat.codes.to_numpy()
+        key = _chain_key(underlying_code, date_days, expiry_days, right_code)
+
+        order = np.lexsort((frame['strike'].to_numpy(), key))
+        self.frame = frame.iloc[order].reset_index(drop=True)
+        self.keys = key[order]
+        self.strikes = self.frame['strike'].to_numpy()
+        self.underlyings = list(self.frame['underlying'].cat.categories)
+        self.dates = pd.DatetimeIndex(np.unique(self.frame['date']))
+        self._underlying_codes = {u: i for i, u in enumerate(self.underlyings)}
+
+    @classmethod
+    def from_reports(cls, df, date=None):
+        """Build the store from parse_som_report / parse_som_reports output."""
+        return cls(chains_to_long(df, date))
+
+    def __len__(self):
+        return len(self.frame)
+
+    # ------------------------
+    # Persistence
+    # ------------------------
+
+    def save(self, path):
+        """Save the sorted rows; the keys are rebuilt on load."""
+        self.frame.to_pickle(path)
+
+    @classmethod
+    def load(cls, path):
+        return cls(pd.read_pickle(path))
+
+    # ------------------------
+    # Lookups
+    # ------------------------
+
+    def _resolve_date(self, date):
+        return self.dates[-1] if date is None else pd.Timestamp(date).normalize()
+
+    def _range(self, underlying, date, expiry=None, right=None):
+        """[lo, hi) row positions of a key prefix."""
+        code = self._underlying_codes.get(underlying)
+        if code is None:
+            return 0, 0
+        day = _days([self._resolve_date(date)])[0]
+        if expiry is None:
+            lo_key = _chain_key(code, day, 0, 0)
+            hi_key = _chain_key(code, day + 1, 0, 0)
+        else:
+            exp = _days([expiry])[0]
+            if right is None:
+                lo_key = _chain_key(code, day, exp, 0)
+                hi_key = _chain_key(code, day, exp + 1, 0)
+            else:
+                r = RIGHTS.index(right)
+                lo_key = _chain_key(code, day, exp, r)
+                hi_key = lo_key + 1
+        lo, hi = np.searchsorted(self.keys, [lo_key, hi_key])
+        return int(lo), int(hi)
+
+    def chain(self, underlying, expiry, date=None, right=None):
+        """
+        Rows of one chain, sorted by right then strike.
+
+        Parameters:
+        underlying (str): Underlying code as in the report (e.g. 'CSE')
+        expiry: Expiry date
+        date: Report date; defaults to the latest date in the store
+        right (str): 'C' or 'P'; None returns both
+        """
+        lo, hi = self._range(underlying, date, expiry, right)
+        return self.frame.iloc[lo:hi]
+
+    def strike_range(self, underlying, expiry, low, high, date=None, right='C'):
+        """Rows of one side of a chain with low <= strike <= high."""
+        lo, hi = self._range(underlying, date, expiry, right)
+        strikes = self.strikes[lo:hi]
+        start = np.searchsorted(strikes, low, side='left')
+        stop = np.searchsorted(strikes, high, side='right')
+        return self.frame.iloc[lo + start:lo + stop]
+
+    def atm_strike(self, underlying, expiry, spot, date=None):
+        """
+        Listed strike nearest to spot (the lower one on a tie), or None if the chain is empty.
+        """
+        lo, hi = self._range(underlying, date, expiry, 'C')
+        if lo == hi:
+            lo, hi = self._range(underlying, date, expiry, 'P')
+        if lo == hi:
+            return None
+        strikes = self.strikes[lo:hi]
+        i = np.searchsorted(strikes, spot)
+        if i == 0:
+            return float(strikes[0])
+        if i == len(strikes):
+            return float(strikes[-1])
+        below, above = strikes[i - 1], strikes[i]
+        return float(below if spot - below <= above - spot else above)
+
+    def expiries(self, underlying, date=None):
+        """Sorted expiries listed for an underlying on a date (latest date by default)."""
+        lo, hi = self._range(underlying, date)
+        return pd.DatetimeIndex(np.unique(self.frame['expiry'].to_numpy()[lo:hi]))
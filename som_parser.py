@@ -0,0 +1,316 @@
+import csv
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Streaming parser for HKEX stock-option (SOM) daily reports.
+#
+# temp.py's process_file reads the whole report with readlines() and builds one DataFrame
+# per chain. Here the file is read line by line and one chain is held at a time, so memory
+# does not depend on the size of the report.
+
+# Bump whenever a change alters the parsed output; som_batch's cache is keyed on it
+PARSER_VERSION = 2
+
+SOM_HEADER = 'MARKET          : SOM   - STOCK OPTIONS'
+COLUMNS = ["Option", "Gross", "Settle Price"]
+
+# The 15 columns of the STRIKE/CALL/PUT block, left to right
+SOM_FIELDS = [
+    'strike',
+    'call_gross', 'call_net', 'call_net_change', 'call_turnover', 'call_deals', 'call_settle', 'call_price_change',
+    'put_gross', 'put_net', 'put_net_change', 'put_turnover', 'put_deals', 'put_settle', 'put_price_change',
+]
+SOM_PRICE_FIELDS = ['strike', 'call_settle', 'call_price_change', 'put_settle', 'put_price_change']
+
+# Separator line under the STRIKE header; column widths are taken from its dash runs
+SOM_DASH_LINE = (
+    '-------- -------- -------- --------- ------- ------- --------- -------- '
+    '-------- -------- --------- ------- ------- --------- --------'
+)
+
+
+def iter_chain_blocks(lines):
+    """
+    Split a SOM report into option chains without holding more than one chain in memory.
+
+    Parameters:
+    lines (iterable): Lines of the report, e.g. an open file
+
+    Yields:
+    tuple: (underlying, expiry, data_lines, spans) where data_lines are the raw STRIKE rows of
+           one chain and spans the column spans read from the dash row under its STRIKE header
+    """
+    lines = iter(lines)
+    pending = None
+    while True:
+        line = pending if pending is not None else next(lines, None)
+        pending = None
+        if line is None:
+            return
+        if not line.startswith(SOM_HEADER):
+            continue
+
+        # Extract header information
+        underlying_line = next(lines, None)
+        exp_line = next(lines, None)
+        if exp_line is None:
+            return
+        try:
+            underlying = underlying_line.split(':')[1].strip()
+            exp_date = exp_line.split(':')[1].strip()
+        except IndexError:
+            continue
+
+        # Skip headers until the STRIKE line, then the dashes under it
+        for line in lines:
+            if line.startswith(' STRIKE'):
+                break
+        else:
+            return
+        spans = block_spans((next(lines, None) or '').rstrip('\n'))
+
+        # Collect data lines until 'TOTAL', a separator, a blank line or the next chain
+        block = []
+        for line in lines:
+            stripped = line.strip()
+            if not stripped or stripped.startswith('----') or stripped.startswith('TOTAL'):
+                break
+            if stripped.startswith('MARKET'):
+                pending = line
+                break
+            block.append(line.rstrip('\n'))
+        yield underlying, exp_date, block, spans
+
+
+def parse_chain_rows(underlying, exp_date, data_lines):
+    """
+    Parse the STRIKE rows of one chain into [Option, Gross, Settle Price] rows,
+    skipping strikes with zero gross open interest (same rules as temp.py).
+    """
+    rows = []
+    for line in data_lines:
+        parts = line.split()
+        if len(parts) < 14:
+            continue  # Skip malformed lines
+        try:
+            strike = float(parts[0])
+            call_gross = int(parts[1].replace(',', ''))
+            call_settle = float(parts[6])
+            put_gross = int(parts[8].replace(',', ''))
+            put_settle = float(parts[13])
+
+            # Add call option if gross is non-zero
+            if call_gross > 0:
+                rows.append([f"{underlying} Call {strike:.0f} {exp_date}", call_gross, call_settle])
+
+            # Add put option if gross is non-zero
+            if put_gross > 0:
+                rows.append([f"{underlying} Put {strike:.0f} {exp_date}", put_gross, put_settle])
+        except (ValueError, IndexError):
+            continue  # Skip lines that can't be parsed
+    return rows
+
+
+def iter_option_chains(file_path):
+    """
+    Read a SOM report incrementally and yield one parsed chain at a time.
+
+    Yields:
+    tuple: (underlying, expiry, rows) with rows as [Option, Gross, Settle Price] lists
+    """
+    with open(file_path, 'r') as file:
+        for underlying, exp_date, data_lines, _ in iter_chain_blocks(file):
+            rows = parse_chain_rows(underlying, exp_date, data_lines)
+            if rows:
+                yield underlying, exp_date, rows
+
+
+def process_file_streaming(file_path, output_path=None):
+    """
+    Streaming replacement for temp.py's process_file.
+
+    Parameters:
+    file_path (str): Path of the SOM report
+    output_path (str): If given, rows are appended to this CSV chain by chain and nothing
+                       is accumulated in memory
+
+    Returns:
+    pandas.DataFrame or int: All rows concatenated once at the end, or the number of rows
+                             written when output_path is given
+    """
+    if output_path is None:
+        all_rows = []
+        for _, _, rows in iter_option_chains(file_path):
+            all_rows.extend(rows)
+        return pd.DataFrame(all_rows, columns=COLUMNS)
+
+    n_rows = 0
+    with open(output_path, 'w', newline='') as out:
+        writer = csv.writer(out)
+        writer.writerow(COLUMNS)
+        for _, _, rows in iter_option_chains(file_path):
+            writer.writerows(rows)
+            n_rows += len(rows)
+    return n_rows
+
+
+# ------------------------
+# Vectorized fixed-width parsing of all 15 columns
+# ------------------------
+
+def column_spans(dash_line=SOM_DASH_LINE):
+    """
+    (start, end) character spans of each column, from a row of dash runs.
+
+    Numbers are right-aligned, so each column also takes the separator space to its left;
+    a value one character wider than its dashes (e.g. a large turnover with commas) still
+    lands in the right column.
+    """
+    ends = [m.end() for m in re.finditer(r'-+', dash_line)]
+    return list(zip([0] + ends[:-1], ends))
+
+
+SOM_SPANS = column_spans()
+
+
+@lru_cache(maxsize=32)
+def block_spans(dash_line):
+    """
+    Column spans of one chain from its own dash row, so a report whose columns are wider or
+    narrower than SOM_DASH_LINE is still sliced correctly. A missing or malformed dash row
+    (not one run per SOM field) falls back to SOM_SPANS.
+    """
+    spans = column_spans(dash_line)
+    return tuple(spans) if len(spans) == len(SOM_FIELDS) else tuple(SOM_SPANS)
+
+
+# Byte lookup tables: digits multiply the mantissa by 10 and add their value, anything else is skipped
+_IS_DIGIT = np.zeros(256, dtype=bool)
+_IS_DIGIT[ord('0'):ord('9') + 1] = True
+_SHIFT = np.where(_IS_DIGIT, 10.0, 1.0)
+_DIGIT = np.where(_IS_DIGIT, np.arange(256) - ord('0'), 0).astype(np.float64)
+
+# Rows parsed per pass; keeps each column slice of the byte matrix in cache
+CHUNK_ROWS = 4096
+
+
+def _parse_numeric_field(chars):
+    """
+    Parse a (rows, width) uint8 matrix of right-aligned numbers such as ' -1,234.50'.
+
+    Works on whole columns at once: the loop runs over the few character positions of
+    the field, never over rows. Digits are accumulated into a mantissa (exact in float64
+    for the field widths of the report), commas and spaces are ignored, and the mantissa
+    is divided by the power of ten given by the digits after the decimal point. Fields
+    without digits become NaN.
+    """
+    n_rows, width = chars.shape
+    mantissa = np.zeros(n_rows)
+    n_digits = np.zeros(n_rows, dtype=np.int64)
+    n_decimals = np.zeros(n_rows, dtype=np.int64)
+    seen_dot = np.zeros(n_rows, dtype=bool)
+    negative = np.zeros(n_rows, dtype=bool)
+
+    for j in range(width):
+        c = chars[:, j]
+        is_digit = _IS_DIGIT[c]
+        mantissa = mantissa * _SHIFT[c] + _DIGIT[c]
+        n_digits += is_digit
+        n_decimals += is_digit & seen_dot
+        seen_dot |= c == ord('.')
+        negative |= c == ord('-')
+
+    values = mantissa / np.power(10.0, n_decimals)
+    values = np.where(negative, -values, values)
+    return np.where(n_digits > 0, values, np.nan)
+
+
+def parse_chain_block(data_lines, spans=SOM_SPANS):
+    """
+    Parse STRIKE rows into all 15 SOM columns with fixed-width slicing over the whole block.
+
+    Parameters:
+    data_lines (list): Raw STRIKE rows as yielded by iter_chain_blocks (any number of chains)
+    spans (list): Column spans from column_spans(), or block_spans() for one chain's dash row
+
+    Returns:
+    dict: field name -> numpy.ndarray (float64; NaN where a field is blank)
+    """
+    width = spans[-1][1]
+    # One fixed-width byte row per line (short lines are NUL padded, which parses as blank)
+    chars = np.array([line[:width] for line in data_lines], dtype=f'S{width}')
+    chars = chars.view(np.uint8).reshape(len(data_lines), width)
+
+    pieces = {field: [] for field in SOM_FIELDS}
+    for row in range(0, len(data_lines), CHUNK_ROWS):
+        chunk = chars[row:row + CHUNK_ROWS]
+        for field, (start, end) in zip(SOM_FIELDS, spans):
+            pieces[field].append(_parse_numeric_field(chunk[:, start:end]))
+    return {
+        field: np.concatenate(parts) if parts else np.empty(0)
+        for field, parts in pieces.items()
+    }
+
+
+def _to_frame(columns, underlyings=None, expiries=None):
+    """Build the typed DataFrame: float prices, int64 counts (nullable Int64 if any are blank)."""
+    df = pd.DataFrame(columns)
+    if underlyings is not None:
+        df.insert(0, 'underlying', underlyings)
+        df.insert(1, 'expiry', expiries)
+    # Same rule as the split-based parser: a row needs a strike and at least 14 fields
+    valid = df['strike'].notna() & (df[SOM_FIELDS].notna().sum(axis=1) >= 14)
+    df = df[valid].reset_index(drop=True)
+    for field in SOM_FIELDS:
+        if field in SOM_PRICE_FIELDS:
+            continue
+        df[field] = df[field].astype('int64' if df[field].notna().all() else 'Int64')
+    return df
+
+
+def parse_som_report(file_path):
+    """
+    Parse every chain of a SOM report into one DataFrame with all 15 columns.
+
+    The file is split into chains by the streaming reader. Consecutive chains with the same
+    column layout (normally the whole report) are then parsed together in one vectorized
+    pass, each run with the spans of its own dash row.
+
+    Returns:
+    pandas.DataFrame: 'underlying', 'expiry' and the SOM_FIELDS columns, one row per strike
+    """
+    runs = []  # [spans, data_lines, underlyings, counts, expiries] per run of same-layout chains
+    with open(file_path, 'r') as file:
+        for underlying, exp_date, block, spans in iter_chain_blocks(file):
+            if not runs or runs[-1][0] != spans:
+                runs.append([spans, [], [], [], []])
+            run = runs[-1]
+            run[1].extend(block)
+            run[2].append(underlying)
+            run[3].append(len(block))
+            run[4].append(exp_date)
+
+    runs = [run for run in runs if run[1]]
+    if not runs:
+        return _to_frame({field: np.empty(0) for field in SOM_FIELDS}, [], [])
+
+    frames = [
+        _to_frame(
+            parse_chain_block(data_lines, spans),
+            np.repeat(underlyings, counts),
+            np.repeat(expiries, counts),
+        )
+        for spans, data_lines, underlyings, counts, expiries in runs
+    ]
+    if len(frames) == 1:
+        return frames[0]
+    # Re-apply the nullable-count rule over the whole report, as a single pass would
+    df = pd.concat([frame.astype({field: 'Int64' for field in SOM_FIELDS if field not in SOM_PRICE_FIELDS})
+                    for frame in frames], ignore_index=True)
+    for field in SOM_FIELDS:
+        if field not in SOM_PRICE_FIELDS and df[field].notna().all():
+            df[field] = df[field].astype('int64')
+    return df
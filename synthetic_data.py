@@ -0,0 +1,351 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from iv_engine import black_call
+from som_parser import SOM_DASH_LINE, SOM_FIELDS, SOM_HEADER, SOM_SPANS
+
+# Vectorized synthetic market data for demos and load testing.
+#
+# Every generator takes a seed and builds its whole output from NumPy arrays of shape
+# (days, tickers[, observations]) - there are no per-row Python loops - so a universe of
+# thousands of tickers over several years is generated in seconds. The write_* helpers put
+# the data in the same on-disk formats the real pipeline reads (DQE pickles, SOM reports).
+
+DEFAULT_SEED = 42
+TRADING_DAYS_PER_YEAR = 252
+# Set to a number of tickers to run the dashboards' sample data at that scale
+LOAD_TEST_ENV = 'SYNTHETIC_TICKERS'
+
+
+def make_tickers(n_tickers, suffix='.HK'):
+    """SEHK-style ticker names: '1.HK', '2.HK', ... (pass suffix='' for bare codes)."""
+    return [f"{code}{suffix}" for code in range(1, n_tickers + 1)]
+
+
+def load_test_universe(default):
+    """The default tickers, or make_tickers($SYNTHETIC_TICKERS) when that is set for a load test."""
+    n_tickers = int(os.environ.get(LOAD_TEST_ENV) or 0)
+    return make_tickers(n_tickers) if n_tickers > 0 else list(default)
+
+
+def make_dates(start='2020-01-01', periods=None, years=None):
+    """Business-day calendar of the given length (periods wins over years; default 6 months)."""
+    if periods is None:
+        periods = int(round((years if years is not None else 0.5) * TRADING_DAYS_PER_YEAR))
+    return pd.bdate_range(start, periods=periods)
+
+
+def _rng(seed):
+    return np.random.default_rng(DEFAULT_SEED if seed is None else seed)
+
+
+def _long_frame(dates, tickers, columns, date_name='Date', ticker_name='Ticker'):
+    """Flatten (days, tickers) arrays into a long frame with one row per (date, ticker)."""
+    n_days, n_tickers = len(dates), len(tickers)
+    frame = pd.DataFrame({
+        date_name: np.repeat(np.asarray(dates), n_tickers),
+        ticker_name: pd.Categorical(np.tile(np.asarray(tickers, dtype=object), n_days)),
+    })
+    for name, values in columns.items():
+        frame[name] = np.asarray(values).reshape(n_days * n_tickers)
+    return frame
+
+
+def spot_paths(tickers, dates, seed=None, start_range=(10.0, 500.0), vol_range=(0.2, 0.5)):
+    """
+    Geometric Brownian motion closing prices.
+
+    Returns:
+    pandas.DataFrame: dates x tickers
+    """
+    rng = _rng(seed)
+    n_days, n_tickers = len(dates), len(tickers)
+    start = rng.uniform(*start_range, n_tickers)
+    sigma = rng.uniform(*vol_range, n_tickers)
+    dt = 1.0 / TRADING_DAYS_PER_YEAR
+    shocks = rng.standard_normal((n_days, n_tickers)) * sigma * np.sqrt(dt) - 0.5 * sigma ** 2 * dt
+    shocks[0] = 0.0
+    return pd.DataFrame(start * np.exp(np.cumsum(shocks, axis=0)), index=dates, columns=tickers).round(2)
+
+
+def atm_vol_observations(tickers, dates, obs_per_day=3, seed=None, base_vols=None, noise=5.0,
+                         bounds=(20.0, 40.0)):
+    """
+    Intraday ATM volatility observations in percent, as plotted by atm_vol.py.
+
+    Each ticker has a base level (drawn from the bounds unless given in base_vols) plus
+    Gaussian noise, clipped to the bounds.
+
+    Returns:
+    pandas.DataFrame: Ticker, Date, ATM_Vol with obs_per_day rows per (date, ticker)
+    """
+    rng = _rng(seed)
+    n_days, n_tickers = len(dates), len(tickers)
+    base = rng.uniform(bounds[0] + noise, bounds[1] - noise, n_tickers)
+    if base_vols is not None:
+        given = pd.Series(base_vols, dtype=np.float64).reindex(tickers).to_numpy()
+        base = np.where(np.isnan(given), base, given)
+    vols = base[None, :, None] + rng.normal(0.0, noise, (n_days, n_tickers, obs_per_day))
+    vols = np.clip(vols, *bounds).round(2)
+    frame = pd.DataFrame({
+        'Ticker': pd.Categorical(np.tile(np.repeat(np.asarray(tickers, dtype=object), obs_per_day), n_days)),
+        'Date': np.repeat(np.asarray(dates), n_tickers * obs_per_day),
+        'ATM_Vol': vols.reshape(-1).astype(np.float32),
+    })
+    return frame
+
+
+def daily_atm_vol(tickers, dates, obs_per_day=3, seed=None, **kwargs):
+    """Daily ATM vol: the mean of each day's observations, rounded to 2 dp."""
+    obs = atm_vol_observations(tickers, dates, obs_per_day, seed, **kwargs)
+    daily = obs.groupby(['Ticker', 'Date'], observed=True)['ATM_Vol'].mean().reset_index()
+    daily['ATM_Vol'] = daily['ATM_Vol'].astype(np.float64).round(2)
+    return daily
+
+
+def option_activity(tickers, dates, seed=None, contract_size=100):
+    """
+    Daily option open interest, volume and notional per underlying.
+
+    Open interest follows a random walk around a per-ticker level, volume is a lognormal
+    fraction of open interest, and notional traded is volume x spot x contract size.
+
+    Returns:
+    pandas.DataFrame: Date, Ticker, Spot, Call OI, Put OI, Volume, Notional Traded
+    """
+    rng = _rng(seed)
+    n_days, n_tickers = len(dates), len(tickers)
+    spot = spot_paths(tickers, dates, seed=rng.integers(2 ** 32)).to_numpy()
+
+    level = rng.lognormal(np.log(50_000), 1.0, (2, n_tickers))
+    drift = np.cumsum(rng.normal(0.0, 0.02, (2, n_days, n_tickers)), axis=1)
+    call_oi, put_oi = np.rint(level[:, None, :] * np.exp(drift)).astype(np.int64)
+    turnover = rng.lognormal(np.log(0.05), 0.5, (n_days, n_tickers))
+    volume = np.rint((call_oi + put_oi) * turnover).astype(np.int64)
+
+    return _long_frame(dates, tickers, {
+        'Spot': spot,
+        'Call OI': call_oi,
+        'Put OI': put_oi,
+        'Volume': volume,
+        'Notional Traded': volume * spot * contract_size,
+    })
+
+
+def short_selling(tickers, dates, seed=None):
+    """
+    Daily short-selling turnover with the option flow it is screened against.
+
+    The '... z' columns are standardised daily changes (N(0, 1)) as used by
+    short-sell-page.py's event rules; the levels are derived from them.
+
+    Returns:
+    pandas.DataFrame: Date, Ticker, Short Turnover, Short Turnover z, Put OI z, Call OI z, Price z
+    """
+    rng = _rng(seed)
+    n_days, n_tickers = len(dates), len(tickers)
+    z = rng.standard_normal((4, n_days, n_tickers))
+    base = rng.lognormal(np.log(5e7), 1.0, n_tickers)
+    turnover = np.rint(base * np.exp(0.3 * z[0])).astype(np.int64)
+    return _long_frame(dates, tickers, {
+        'Short Turnover': turnover,
+        'Short Turnover z': z[0],
+        'Put OI z': z[1],
+        'Call OI z': z[2],
+        'Price z': z[3],
+    })
+
+
+def regression_panel(codes, dates, seed=None):
+    """
+    Daily features and ATM vol per SEHK code in the layout ridge_regr1.py and ridge_regr2.py use.
+
+    ATM vol is an AR(1) process around a per-code level with a small loading on the
+    volume/OI ratio, so the regressions have some signal to find.
+
+    Returns:
+    pandas.DataFrame: date, SEHK_Code, ATM_vol, OInt, Volume, Call_OInt_Volume,
+                      Put_OInt_Volume, Volume_Total_OI
+    """
+    rng = _rng(seed)
+    activity = option_activity(codes, dates, seed=rng.integers(2 ** 32))
+    shape = (len(dates), len(codes))
+    call_oi = activity['Call OI'].to_numpy().reshape(shape)
+    put_oi = activity['Put OI'].to_numpy().reshape(shape)
+    volume = activity['Volume'].to_numpy().reshape(shape)
+    oi = call_oi + put_oi
+    ratio = volume / oi
+
+    level = rng.uniform(0.2, 0.4, len(codes))
+    shocks = rng.normal(0.0, 0.01, shape) + 0.2 * (ratio - ratio.mean(axis=0))
+    vol = np.empty(shape)
+    vol[0] = level
+    for day in range(1, shape[0]):  # AR(1) recursion: one step per day, vectorized over codes
+        vol[day] = level + 0.9 * (vol[day - 1] - level) + shocks[day]
+
+    return _long_frame(dates, codes, {
+        'ATM_vol': vol,
+        'OInt': oi,
+        'Volume': volume,
+        'Call_OInt_Volume': call_oi / np.maximum(volume, 1),
+        'Put_OInt_Volume': put_oi / np.maximum(volume, 1),
+        'Volume_Total_OI': ratio,
+    }, date_name='date', ticker_name='SEHK_Code')
+
+
+def iter_som_chains(underlyings, dates, seed=None, chunk_days=5, n_expiries=3, n_strikes=21,
+                    strike_width=0.4, skew=-0.1):
+    """
+    som_chains in blocks of chunk_days dates, so only one block's (days, underlyings,
+    expiries, strikes) arrays are in memory at a time. Spot paths and base vols are drawn
+    for the whole range up front, so the paths do not depend on chunk_days.
+
+    Yields:
+    pandas.DataFrame: The som_chains columns for each block of dates, in date order
+    """
+    rng = _rng(seed)
+    n_under = len(underlyings)
+    spot = spot_paths(underlyings, dates, seed=rng.integers(2 ** 32)).to_numpy()
+    base_vol = rng.uniform(0.2, 0.45, n_under)
+    dates = pd.DatetimeIndex(dates)
+    grid = np.linspace(1 - strike_width, 1 + strike_width, n_strikes)
+    flat = lambda a: np.asarray(a).reshape(-1)
+
+    for start in range(0, len(dates), chunk_days):
+        block = dates[start:start + chunk_days]
+        expiries = np.stack([
+            (block + pd.offsets.BMonthEnd(k + 1)).to_numpy() for k in range(n_expiries)
+        ], axis=1)                                                        # (days, expiries)
+        t = (expiries - block.to_numpy()[:, None]).astype('timedelta64[D]').astype(np.float64) / 365.0
+
+        shape = (len(block), n_under, n_expiries, n_strikes)
+        forward = np.broadcast_to(spot[start:start + chunk_days, :, None, None], shape)
+        strike = np.round(forward * grid, 2)
+        tt = np.broadcast_to(t[:, None, :, None], shape)
+        sigma = np.maximum(base_vol[None, :, None, None] + skew * np.log(strike / forward), 0.05)
+
+        call = np.round(black_call(forward, strike, tt, sigma), 2)
+        put = np.round(np.maximum(call - (forward - strike), 0.0), 2)
+        size = rng.integers(0, 5000, (2, 3) + shape)                   # gross, net, turnover (contracts)
+
+        # Format the (days, expiries) grid only, then broadcast the names to every row
+        names = np.asarray(pd.DatetimeIndex(flat(expiries)).strftime('%d %b %y').str.upper(), dtype=object)
+        expiry_names = flat(np.broadcast_to(names.reshape(expiries.shape)[:, None, :, None], shape))
+        columns = {
+            'date': flat(np.broadcast_to(block.to_numpy()[:, None, None, None], shape)),
+            'underlying': flat(np.broadcast_to(np.asarray(underlyings, dtype=object)[None, :, None, None], shape)),
+            'expiry': expiry_names,
+            'strike': flat(strike),
+        }
+        for side, (prices, k) in {'call': (call, 0), 'put': (put, 1)}.items():
+            gross = np.maximum(size[k, 0], size[k, 1])
+            columns[f'{side}_gross'] = flat(gross)
+            columns[f'{side}_net'] = flat(size[k, 1])
+            columns[f'{side}_net_change'] = flat(rng.integers(-500, 500, shape))
+            columns[f'{side}_turnover'] = flat(size[k, 2])
+            columns[f'{side}_deals'] = flat(size[k, 2] // 5)
+            columns[f'{side}_settle'] = flat(prices)
+            columns[f'{side}_price_change'] = flat(np.round(prices * rng.normal(0.0, 0.05, shape), 2) + 0.0)
+        yield pd.DataFrame(columns)[['date', 'underlying', 'expiry'] + SOM_FIELDS]
+
+
+def som_chains(underlyings, dates, seed=None, n_expiries=3, n_strikes=21, strike_width=0.4,
+               skew=-0.1):
+    """
+    SOM-style option chains priced off a skewed Black-76 smile.
+
+    Expiries are the last business day of the next n_expiries months; strikes are evenly
+    spaced within +/- strike_width of spot. Settle prices are rounded to the tick, so the
+    implied-vol engine recovers the smile up to rounding. For long ranges over a large
+    universe use iter_som_chains or write_som_archive, which work a block of dates at a time.
+
+    Returns:
+    pandas.DataFrame: date, underlying, expiry ('30 JUL 25' style) and the 15 SOM_FIELDS,
+                      as returned by som_batch.parse_som_reports
+    """
+    return pd.concat(list(iter_som_chains(underlyings, dates, seed, max(len(dates), 1), n_expiries,
+                                          n_strikes, strike_width, skew)), ignore_index=True)
+
+
+# ------------------------
+# Writers for the real on-disk formats
+# ------------------------
+
+def write_dqe_files(directory_path, tickers, dates, seed=None):
+    """
+    Write one DQE_YYMMDD.pickle per date with the columns dqe_loader.load_dqe_files expects.
+
+    Returns:
+    list: Paths written
+    """
+    os.makedirs(directory_path, exist_ok=True)
+    activity = option_activity(tickers, dates, seed)
+    activity['notional'] = activity['Notional Traded']
+    activity['open_interest'] = activity['Call OI'] + activity['Put OI']
+    activity = activity.rename(columns={'Ticker': 'ticker', 'Volume': 'volume', 'Spot': 'spot_price'})
+
+    paths = []
+    for date, day in activity.groupby('Date', sort=True):
+        path = os.path.join(directory_path, f"DQE_{pd.Timestamp(date):%y%m%d}.pickle")
+        day[['ticker', 'volume', 'notional', 'open_interest', 'spot_price']] \
+            .astype({'ticker': str}).reset_index(drop=True).to_pickle(path)
+        paths.append(path)
+    return paths
+
+
+def _format_rows(chain):
+    """Right-align every SOM field into its column span, one text line per strike."""
+    template, columns = '', []
+    for field, (start, end) in zip(SOM_FIELDS, SOM_SPANS):
+        if field.endswith(('settle', 'price_change')) or field == 'strike':
+            template += f'%{end - start}.2f'
+            columns.append(chain[field].to_numpy(dtype=np.float64).tolist())
+        else:
+            template += f'%{end - start}d'
+            columns.append(chain[field].to_numpy(dtype=np.int64).tolist())
+    return np.array([template % row for row in zip(*columns)], dtype=object)
+
+
+def write_som_reports(directory_path, chains):
+    """
+    Write chains (as returned by som_chains) as one fixed-width SOM report per date, named
+    som_YYYYMMDD.txt so som_batch.report_date recovers the date.
+
+    Returns:
+    list: Paths written
+    """
+    os.makedirs(directory_path, exist_ok=True)
+    header = ' STRIKE    GROSS      NET   CHANGE  TURNOVER   DEALS SETTLE    CHANGE' \
+             '    GROSS      NET   CHANGE  TURNOVER   DEALS SETTLE    CHANGE'
+    paths = []
+    for date, day in chains.groupby('date', sort=True):
+        path = os.path.join(directory_path, f"som_{pd.Timestamp(date):%Y%m%d}.txt")
+        # Format the whole day at once, then pick out each chain's lines by position
+        lines = _format_rows(day)
+        blocks = day.groupby(['underlying', 'expiry'], sort=False).indices
+        with open(path, 'w') as f:
+            for (underlying, expiry), rows in blocks.items():
+                f.write(f"{SOM_HEADER}\n"
+                        f"UNDERLYING      : {underlying}\n"
+                        f"EXPIRY          : {expiry}\n\n"
+                        f"{header}\n{SOM_DASH_LINE}\n")
+                f.write('\n'.join(lines[rows]))
+                f.write('\nTOTAL\n\n')
+        paths.append(path)
+    return paths
+
+
+def write_som_archive(directory_path, underlyings, dates, seed=None, chunk_days=5, **kwargs):
+    """
+    Generate and write SOM reports for a long date range a block of dates at a time, so
+    memory stays bounded by one block (e.g. 3000 underlyings over 5 years for a load test).
+
+    Returns:
+    list: Paths written
+    """
+    paths = []
+    for chains in iter_som_chains(underlyings, dates, seed, chunk_days, **kwargs):
+        paths.extend(write_som_reports(directory_path, chains))
+    return paths
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from ridge_batch import FEATURES
+
+# Universe-wide scoring of the per-code vol models.
+#
+# All per-code coefficients are stacked into one (codes x features) matrix, the latest
+# feature row of every code is gathered into a matching matrix, and the next-day forecasts
+# are one row-wise dot product. The forecast table is cached on disk under a key made from
+# the models and the data it was scored on, and held in memory as a dict for lookups.
+
+DEFAULT_FORECAST_PATH = 'vol_forecasts.pkl'
+
+
+def stack_coefficients(registry):
+    """
+    Stack a {code: record} registry (model_registry or ridge_batch results).
+
+    Returns:
+    tuple: (codes (G,), coef (G, p), intercept (G,), feature_names)
+    """
+    codes = sorted(registry)
+    if not codes:
+        return np.array([], dtype=object), np.zeros((0, len(FEATURES))), np.zeros(0), list(FEATURES)
+    feature_names = list(registry[codes[0]]['feature_names'])
+    if any(list(registry[c]['feature_names']) != feature_names for c in codes):
+        raise ValueError("All models must use the same features to be stacked")
+    coef = np.vstack([np.asarray(registry[c]['coef'], dtype=np.float64) for c in codes])
+    intercept = np.array([registry[c]['intercept'] for c in codes], dtype=np.float64)
+    return np.array(codes, dtype=object), coef, intercept, feature_names
+
+
+def latest_feature_rows(data, features=FEATURES, code_col='SEHK_Code', date_col='date'):
+    """Last row with complete features per code; data is a DataFrame or a FeatureStore."""
+    frame = data.frame() if hasattr(data, 'frame') else data
+    frame = frame.dropna(subset=list(features))
+    frame = frame.sort_values([code_col, date_col], kind='mergesort')
+    latest = frame.groupby(code_col, sort=False, observed=True).tail(1)
+    return latest.assign(**{code_col: latest[code_col].astype(str)}).set_index(code_col)
+
+
+def score_latest(registry, data, code_col='SEHK_Code', date_col='date'):
+    """
+    Next-day ATM_vol forecast for every code that has both a model and data.
+
+    Returns:
+    pandas.DataFrame: Indexed by code with 'date' (of the features), 'ATM_vol' (current),
+                      'ATM_vol_forecast' and 'forecast_change'
+    """
+    codes, coef, intercept, features = stack_coefficients(registry)
+    latest = latest_feature_rows(data, features, code_col, date_col)
+    rows = pd.Index(codes.astype(str)).get_indexer(latest.index)
+    scored = latest[rows >= 0]
+    rows = rows[rows >= 0]
+
+    X = scored[features].to_numpy(dtype=np.float64)
+    forecast = np.einsum('np,np->n', X, coef[rows]) + intercept[rows]
+    table = pd.DataFrame({
+        'date': scored[date_col].to_numpy(),
+        'ATM_vol': scored['ATM_vol'].to_numpy(dtype=np.float64),
+        'ATM_vol_forecast': forecast,
+    }, index=pd.Index(scored.index, name=code_col))
+    table['forecast_change'] = table['ATM_vol_forecast'] - table['ATM_vol']
+    return table
+
+
+def _cache_key(registry, data, date_col='date'):
+    """Identify the models (code, data hash, training time) and the data (version or size and last date)."""
+    digest = hashlib.sha256()
+    for code in sorted(registry):
+        record = registry[code]
+        digest.update(repr((code, record.get('data_hash'), record.get('trained_at'))).encode())
+    if getattr(data, 'data_version', None) is not None:
+        data_key = ('version', data.data_version)
+    else:
+        frame = data.frame() if hasattr(data, 'frame') else data
+        data_key = ('frame', len(frame), str(pd.to_datetime(frame[date_col]).max()))
+    return digest.hexdigest(), data_key
+
+
+class ForecastTable:
+    """
+    Cached forecast table for the dashboards.
+
+    Parameters:
+    path (str): Pickle the table is persisted to
+    """
+
+    def __init__(self, path=DEFAULT_FORECAST_PATH):
+        self.path = path
+        self.key = None
+        self.table = pd.DataFrame(columns=['date', 'ATM_vol', 'ATM_vol_forecast', 'forecast_change'])
+        self._records = {}
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            self._set(state['key'], state['table'])
+
+    def _set(self, key, table):
+        self.key = key
+        self.table = table
+        self._records = table.to_dict('index')
+
+    def refresh(self, registry, data, code_col='SEHK_Code', date_col='date'):
+        """
+        Re-score when the models or the data differ from the cached table.
+
+        Returns:
+        bool: True if the table was recomputed
+        """
+        key = _cache_key(registry, data, date_col)
+        if key == self.key:
+            return False
+        table = score_latest(registry, data, code_col, date_col)
+        with open(self.path + '.tmp', 'wb') as f:
+            pickle.dump({'key': key, 'table': table}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(self.path + '.tmp', self.path)
+        self._set(key, table)
+        return True
+
+    def lookup(self, code):
+        """Forecast record of one code ({'date', 'ATM_vol', 'ATM_vol_forecast', 'forecast_change'}) or None."""
+        return self._records.get(str(code))
+
+    def __contains__(self, code):
+        return str(code) in self._records
+
+
+def with_forecasts(tickers_data, code_column='SEHK Code', path=DEFAULT_FORECAST_PATH):
+    """
+    Add 'ATM Vol' and 'Predicted ATM Vol' columns to a summary table from the cached
+    forecasts; the table is returned unchanged when no forecast covers its codes.
+    """
+    forecasts = ForecastTable(path)
+    codes = tickers_data[code_column].astype(str)
+    if not any(code in forecasts for code in codes):
+        return tickers_data
+    records = [forecasts.lookup(code) or {} for code in codes]
+    tickers_data = tickers_data.copy()
+    tickers_data['ATM Vol'] = [round(r['ATM_vol'], 4) if r else None for r in records]
+    tickers_data['Predicted ATM Vol'] = [round(r['ATM_vol_forecast'], 4) if r else None for r in records]
+    return tickers_data
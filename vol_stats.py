@@ -0,0 +1,295 @@
+import os
+import pickle
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Incremental rolling-window statistics of daily ATM volatility per ticker.
+#
+# The state is a (tickers x window) ring buffer of daily values, the same values kept
+# sorted per ticker, and running sums. Appending a day evicts the oldest column and
+# inserts the new one into every sorted row with vectorized index arithmetic, so an update
+# costs O(tickers x window) whatever the length of the history, and median, quantiles,
+# min and max are read exactly from the sorted rows.
+
+DEFAULT_STATS_PATH = 'atm_vol_stats.pkl'
+DEFAULT_WINDOW = 126  # 6 months * 21 trading days/month
+BOX_CACHE_SIZE = 32    # (universe, window) box summaries kept in memory
+MAX_OUTLIERS = 20      # Most extreme outliers sent per ticker, so payloads do not grow with history
+
+
+class RollingVolStats:
+    """
+    Per-ticker rolling statistics over the last `window` dates appended.
+
+    Parameters:
+    window (int): Number of dates in the rolling window
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.tickers = []
+        self.dates = []                     # Dates in the window, oldest first
+        self._rows = {}                     # ticker -> row
+        self._ring = np.empty((0, window))  # Values by slot; NaN where missing
+        self._sorted = np.empty((0, window))  # Values ascending per row, NaN tail
+        self._slot = 0                      # Slot the next date is written to
+        self._sum = np.empty(0)
+        self._sum_sq = np.empty(0)
+        self._count = np.empty(0, dtype=np.int64)
+
+    @property
+    def last_date(self):
+        return self.dates[-1] if self.dates else None
+
+    def _add_tickers(self, tickers):
+        new = [t for t in tickers if t not in self._rows]
+        if not new:
+            return
+        for t in new:
+            self._rows[t] = len(self.tickers)
+            self.tickers.append(t)
+        blank = np.full((len(new), self.window), np.nan)
+        self._ring = np.vstack([self._ring, blank])
+        self._sorted = np.vstack([self._sorted, blank])
+        self._sum = np.concatenate([self._sum, np.zeros(len(new))])
+        self._sum_sq = np.concatenate([self._sum_sq, np.zeros(len(new))])
+        self._count = np.concatenate([self._count, np.zeros(len(new), dtype=np.int64)])
+
+    def append(self, date, values):
+        """
+        Add one date of values (ticker -> daily ATM vol), evicting the oldest date once the
+        window is full. Tickers missing on this date count as missing, not as zero.
+        """
+        values = pd.Series(values, dtype=np.float64)
+        values = values[~values.index.duplicated(keep='last')]
+        self._add_tickers(list(values.index))
+        new = np.full(len(self.tickers), np.nan)
+        new[[self._rows[t] for t in values.index]] = values.to_numpy()
+        self._push(date, new)
+
+    def _push(self, date, new):
+        """Append one date given as an array aligned with self.tickers."""
+        rows = np.arange(len(self.tickers))
+        cols = np.arange(self.window)[None, :]
+        old = self._ring[:, self._slot].copy()
+        had_old, has_new = ~np.isnan(old), ~np.isnan(new)
+
+        # Remove the evicted value from each sorted row (rows without one drop a NaN from the tail)
+        matches = self._sorted == old[:, None]
+        drop = np.where(had_old, matches.argmax(axis=1), self.window - 1)
+        shifted = np.take_along_axis(self._sorted, np.minimum(cols + (cols >= drop[:, None]), self.window - 1), axis=1)
+        shifted[:, -1] = np.nan
+
+        # Insert the new value at its rank; NaNs go to the tail
+        rank = np.where(has_new, (shifted < new[:, None]).sum(axis=1), self.window - 1)
+        self._sorted = np.take_along_axis(shifted, np.maximum(cols - (cols > rank[:, None]), 0), axis=1)
+        self._sorted[rows, rank] = new
+
+        self._sum += np.where(has_new, new, 0.0) - np.where(had_old, old, 0.0)
+        self._sum_sq += np.where(has_new, new * new, 0.0) - np.where(had_old, old * old, 0.0)
+        self._count += has_new.astype(np.int64) - had_old.astype(np.int64)
+        self._ring[:, self._slot] = new
+        self._slot = (self._slot + 1) % self.window
+        if self._slot == 0:
+            # Recompute the running sums once per window so rounding errors cannot accumulate
+            self._sum = np.nansum(self._ring, axis=1)
+            self._sum_sq = np.nansum(self._ring * self._ring, axis=1)
+
+        self.dates.append(pd.Timestamp(date))
+        if len(self.dates) > self.window:
+            self.dates.pop(0)
+
+    def update(self, daily_df, date_col='Date', ticker_col='Ticker', value_col='ATM_Vol'):
+        """
+        Append every date of a long daily frame that is newer than the last date appended.
+
+        Returns:
+        list: Dates appended
+        """
+        dates = pd.to_datetime(daily_df[date_col])
+        if self.last_date is not None:
+            daily_df, dates = daily_df[dates > self.last_date], dates[dates > self.last_date]
+        if daily_df.empty:
+            return []
+        # One pivot for the whole batch, then one array push per date
+        matrix = pd.pivot_table(daily_df.assign(**{date_col: dates, ticker_col: daily_df[ticker_col].astype(str)}),
+                                index=date_col, columns=ticker_col, values=value_col, aggfunc='last')
+        self._add_tickers(list(matrix.columns))
+        matrix = matrix.reindex(columns=self.tickers).sort_index()
+        if len(matrix) >= self.window:
+            # Everything currently held would be evicted: start empty and push only the tail
+            self._ring[:] = np.nan
+            self._sorted[:] = np.nan
+            self._sum[:], self._sum_sq[:], self._count[:] = 0.0, 0.0, 0
+            self._slot, self.dates = 0, []
+            skipped, matrix = list(matrix.index[:-self.window]), matrix.iloc[-self.window:]
+        else:
+            skipped = []
+        for date, new in zip(matrix.index, matrix.to_numpy(dtype=np.float64)):
+            self._push(date, new)
+        return skipped + list(matrix.index)
+
+    def append_observations(self, date, observations, ticker_col='Ticker', value_col='ATM_Vol'):
+        """Append one date of intraday observations, averaged per ticker as in atm_vol.py."""
+        daily = observations.groupby(observations[ticker_col].astype(str))[value_col].mean()
+        self.append(date, daily)
+
+    def quantiles(self, q):
+        """Exact window quantiles (linear interpolation, as pandas) per ticker; NaN without data."""
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        count = self._count
+        position = q[None, :] * np.maximum(count - 1, 0)[:, None]
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, np.maximum(count - 1, 0)[:, None])
+        frac = position - lower
+        lo = np.take_along_axis(self._sorted, lower, axis=1)
+        hi = np.take_along_axis(self._sorted, upper, axis=1)
+        result = lo + frac * (hi - lo)
+        result[count == 0] = np.nan
+        return pd.DataFrame(result, index=pd.Index(self.tickers, name='Ticker'), columns=q)
+
+    def stats(self):
+        """
+        Window statistics per ticker.
+
+        Returns:
+        pandas.DataFrame: Ticker, Mean, Median, Min, Max, Std (sample), Q1, Q3 and Count
+        """
+        count = self._count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = self._sum / count
+            var = (self._sum_sq - count * mean * mean) / (count - 1)
+        quartiles = self.quantiles([0.25, 0.5, 0.75])
+        last = np.maximum(count - 1, 0)
+        stats = pd.DataFrame({
+            'Ticker': self.tickers,
+            'Mean': mean,
+            'Median': quartiles[0.5].to_numpy(),
+            'Min': np.where(count > 0, self._sorted[:, 0], np.nan),
+            'Max': np.where(count > 0, self._sorted[np.arange(len(count)), last], np.nan),
+            'Std': np.sqrt(np.maximum(var, 0.0)),
+            'Q1': quartiles[0.25].to_numpy(),
+            'Q3': quartiles[0.75].to_numpy(),
+            'Count': count,
+        })
+        return stats.sort_values('Ticker').reset_index(drop=True)
+
+    def save(self, path=DEFAULT_STATS_PATH):
+        """Persist the state atomically."""
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_STATS_PATH):
+        stats = cls.__new__(cls)
+        with open(path, 'rb') as f:
+            stats.__dict__.update(pickle.load(f))
+        return stats
+
+    @classmethod
+    def load_or_build(cls, daily_df, path=DEFAULT_STATS_PATH, window=DEFAULT_WINDOW, **columns):
+        """
+        Load the saved state and append only the dates of daily_df it has not seen; build it
+        from scratch when there is no saved state or its window differs. Saves when anything
+        changed; path=None keeps the state in memory only.
+        """
+        stats = cls.load(path) if path is not None and os.path.exists(path) else None
+        if stats is None or stats.window != window:
+            stats = cls(window)
+        if stats.update(daily_df, **columns) and path is not None:
+            stats.save(path)
+        return stats
+
+
+def box_plot_stats(daily_df, tickers=None, start=None, end=None, whisker=1.5, max_outliers=MAX_OUTLIERS,
+                   date_col='Date', ticker_col='Ticker', value_col='ATM_Vol'):
+    """
+    Box-plot summaries for every ticker at once, so only summary arrays go to the browser.
+
+    Values are pivoted to a (dates x tickers) matrix and sorted down each column; quartiles
+    use linear interpolation (Plotly's default quartile method), whiskers end at the most
+    extreme values within `whisker` IQRs of the box, and values beyond them are outliers.
+
+    Parameters:
+    daily_df (pandas.DataFrame): Long daily values
+    tickers (list): Universe to summarise; all tickers in daily_df if omitted
+    start, end: Inclusive date window; unbounded if omitted
+
+    Returns:
+    pandas.DataFrame: Ticker, Q1, Median, Q3, Mean, LowerFence, UpperFence, Outliers (list
+                      of at most max_outliers values, the furthest from the median first) and Count
+    """
+    dates = pd.to_datetime(daily_df[date_col])
+    keep = np.ones(len(daily_df), dtype=bool)
+    if start is not None:
+        keep &= (dates >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        keep &= (dates <= pd.Timestamp(end)).to_numpy()
+    window = daily_df[keep]
+    matrix = pd.pivot_table(window.assign(**{ticker_col: window[ticker_col].astype(str)}),
+                            index=date_col, columns=ticker_col, values=value_col, aggfunc='mean')
+    if tickers is not None:
+        matrix = matrix.reindex(columns=[str(t) for t in tickers])
+    values = np.sort(matrix.to_numpy(dtype=np.float64), axis=0)  # NaNs sort last
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN columns for tickers without data
+        q1, median, q3 = np.nanquantile(values, [0.25, 0.5, 0.75], axis=0)
+        mean = np.nanmean(values, axis=0)
+    iqr = q3 - q1
+    low, high = q1 - whisker * iqr, q3 + whisker * iqr
+    inside = (values >= low) & (values <= high)
+    lower_fence = np.nanmin(np.where(inside, values, np.inf), axis=0)
+    upper_fence = np.nanmax(np.where(inside, values, -np.inf), axis=0)
+    count = (~np.isnan(values)).sum(axis=0)
+
+    outside = ~inside & ~np.isnan(values)
+    distance = np.where(outside, np.abs(values - median), -1.0)
+    order = np.argsort(-distance, axis=0)[:max_outliers]
+    extreme = np.take_along_axis(values, order, axis=0)
+    extreme_ok = np.take_along_axis(outside, order, axis=0)
+    outliers = [extreme[:, j][extreme_ok[:, j]].tolist() for j in range(values.shape[1])]
+
+    return pd.DataFrame({
+        'Ticker': matrix.columns.astype(str),
+        'Q1': q1,
+        'Median': median,
+        'Q3': q3,
+        'Mean': mean,
+        'LowerFence': np.where(count > 0, lower_fence, np.nan),
+        'UpperFence': np.where(count > 0, upper_fence, np.nan),
+        'Outliers': outliers,
+        'Count': count,
+    })
+
+
+_box_cache = OrderedDict()
+
+
+def cached_box_plot_stats(daily_df, tickers=None, start=None, end=None, **kwargs):
+    """
+    box_plot_stats cached per (universe, date window) and the data it was computed from.
+
+    The data is identified by its row count and latest date, so appending a day of data
+    invalidates the entries computed before it.
+    """
+    dates = pd.to_datetime(daily_df[kwargs.get('date_col', 'Date')])
+    key = (
+        tuple(str(t) for t in tickers) if tickers is not None else None,
+        None if start is None else pd.Timestamp(start),
+        None if end is None else pd.Timestamp(end),
+        len(daily_df), dates.max() if len(dates) else None,
+        tuple(sorted(kwargs.items())),
+    )
+    if key in _box_cache:
+        _box_cache.move_to_end(key)
+        return _box_cache[key]
+    stats = box_plot_stats(daily_df, tickers, start, end, **kwargs)
+    _box_cache[key] = stats
+    while len(_box_cache) > BOX_CACHE_SIZE:
+        _box_cache.popitem(last=False)
+    return stats
@@ -5,6 +5,10 @@ from dash import dcc, html, Input, Output, dash_table
 import dash_bootstrap_components as dbc
 import pandas as pd
 
+from greeks_engine import with_exposure
+from skew_engine import with_real_skew
+from vol_scoring import with_forecasts
+
 # Sample data (replace with your actual data)
 tickers_data = pd.DataFrame([
     {'SEHK Code': '0001', 'Open Interest': 120000, 'Skew': 0.45, 'Identifier': 'CKH', 'Notional traded': 5000000},
@@ -12,6 +16,12 @@ tickers_data = pd.DataFrame([
     {'SEHK Code': '0700', 'Open Interest': 250000, 'Skew': 0.63, 'Identifier': 'TENCENT', 'Notional traded': 8000000},
     {'SEHK Code': '2318', 'Open Interest': 170000, 'Skew': 0.21, 'Identifier': 'PING AN', 'Notional traded': 4200000},
 ])
+# Real 25-delta risk reversals from the skew cache, where one has been built
+tickers_data = with_real_skew(tickers_data)
+# Net dealer gamma and delta exposure from the greeks cache, where one has been built
+tickers_data = with_exposure(tickers_data)
+# Current and model-predicted next-day ATM vol from the cached forecast table
+tickers_data = with_forecasts(tickers_data)
 
 upside_data = pd.DataFrame([
     {'SEHK Code': '0700', 'Signal': 'Strong', 'Score': 9.1},